@@ -79,5 +79,27 @@ class Config:
     def as_dict(self):
         return asdict(self)
 
+    def algorithm_settings(self, algo_id) -> dict:
+        """
+        The settings an algorithm is built with: the environment, training and algorithm parameters. The parameters
+        are class attributes (possibly overridden on the instances), which as_dict leaves out.
+
+        :param algo_id: The algorithm id
+        :return: The value of each parameter, as a string, by "section.name"
+        """
+
+        settings = {}
+        for section, config in (("env", self.env), ("train_config", self.train_config), ("algo", self.algos[algo_id])):
+            names = set(vars(config if isinstance(config, type) else type(config)))
+            if not isinstance(config, type):
+                names.update(vars(config))
+
+            for name in names:
+                value = getattr(config, name)
+                if not name.startswith("_") and not callable(value):
+                    settings[f"{section}.{name}"] = str(value)
+
+        return dict(sorted(settings.items()))
+
 
 CONFIG: Config = Config()
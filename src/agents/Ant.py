@@ -1,11 +1,11 @@
-import random
+from array import array
 
 from agents.Agent import Agent
 from environments.ACOEnvironment import ACOEnvironment
-from helpers.Direction import Direction
+from helpers.Direction import DIRECTIONS
 from helpers.PathSpecification import PathSpecification
 from helpers.Path import Path
-import numpy as np
+from helpers.Sampler import Sampler
 
 
 class Ant(Agent):
@@ -14,10 +14,21 @@ class Ant(Agent):
     """
 
     def __init__(self, environment: ACOEnvironment, path_specification: PathSpecification,
-                 convergence_iter: int, trail: float, step_size: int = 1):
+                 convergence_iter: int, trail: float, step_size: int = 1, rng=None):
+        """
+        Constructor for the ant.
+
+        :param environment: environment the ant will be running in.
+        :param path_specification: The path specification consists of a start coordinate and an end coordinate.
+        :param convergence_iter: Maximum number of iterations (steps or backtracks) of the ant.
+        :param trail: The exponent of the pheromones in the transition probabilities.
+        :param step_size: How many cells does the ant move in each direction.
+        :param rng: The random number generator (a numpy Generator, or the np.random module). Default: np.random
+        """
+
         super().__init__(environment, path_specification, step_size)
 
-        self.rand = random
+        self.sampler: Sampler = Sampler(rng)
         self.convergence_iter = convergence_iter
         self.trail = trail
 
@@ -31,59 +42,67 @@ class Ant(Agent):
         # We start from the starting path
         path = Path(self.start)
 
+        # Cells are flat indices in the padded layout of the environment, where the neighbours are at fixed offsets
+        offsets = self.environment.neighbour_offsets(self.step_size)
+        neighbour_offsets = offsets.tolist()
+        cell = self.environment.cell_index(self.start)
+        end = self.environment.cell_index(self.end)
+
         # By marking visited cells, in the environment and setting their pheromone level to 0, upcoming agents will
         # never choose said cells as a path to explore. This allows avoiding infinite loops where agents go over a
         # path infinite times, ending up in positions they have already visited
-        visited = [self.start]
+        # One byte per cell, so checking a cell does not depend on the length of the walk
+        visited = bytearray(self.environment.cell_count())
+        visited[cell] = 1
 
         # Improvement: the ants have memory, which allow them to know which were decision points in their so-far
         # explored path This way, we avoid dead ends, and the ants can go back to the previous decision point
-        stack = []
+        # The decision points are the ends of the path when it had the stacked number of coordinates
+        stack = array("q")
 
         # Until we reach the end
-        while self.current_position != self.end:
+        while cell != end:
             # We get the total surrounding pheromone at the current position
             self.convergence_iter -= 1
 
             if self.convergence_iter == 0:
                 return None
 
-            surrounding_pheromone = self.environment.get_surrounding_pheromone(self.current_position, self.step_size)
-            tot_pheromones = surrounding_pheromone.get_total_surrounding_pheromone()
+            # Pheromones of the 8 neighbours, in the order of Direction
+            surrounding_pheromone = self.environment.get_cell_pheromones(offsets + cell).tolist()
+            tot_pheromones = sum(surrounding_pheromone)
 
             # Cumulative probabilities for each direction
             # Here probability = p^k_{ij}(t), where \eta_{ij}=1 (as the next direction is always one step away).
             probabilities = [0.0 for _ in range(7)]
 
             for i in range(7):
-                if not self.current_position.add_direction(Direction(i), self.step_size) in visited:
+                if not visited[cell + neighbour_offsets[i]]:
                     # Since distance = 1 always, no need for visibility parameter
-                    probabilities[i] = surrounding_pheromone.get(Direction(i)) ** self.trail
+                    probabilities[i] = surrounding_pheromone[i] ** self.trail
                 else:
-                    tot_pheromones -= surrounding_pheromone.get(Direction(i))
+                    tot_pheromones -= surrounding_pheromone[i]
 
             total = sum(probabilities)
 
             if tot_pheromones == 0 or total == 0:
                 if len(stack) > 0:
-                    self.current_position, path_length = stack.pop()
-                    while path.size() > path_length:
-                        path.remove_last()
+                    path.truncate(stack.pop())
+                    self.current_position = path.last()
+                    cell = self.environment.cell_index(self.current_position)
                     continue
                 else:
                     return None
 
             if len(probabilities) - probabilities.count(0) >= 2:
-                stack.append((self.current_position, path.size()))
-
-            for i in range(len(probabilities)):
-                probabilities[i] /= total
+                stack.append(len(path))
 
             # Get index of a selected direction following probability distribution
-            choice = np.random.choice(range(len(probabilities)), p=probabilities)
-            self.current_position = self.current_position.add_direction(Direction(choice), self.step_size)
+            choice = self.sampler.choice(probabilities, total)
+            self.current_position = self.current_position.add_direction(DIRECTIONS[choice], self.step_size)
             path.add(self.current_position)
 
-            visited.append(self.current_position)
+            cell += neighbour_offsets[choice]
+            visited[cell] = 1
 
         return path
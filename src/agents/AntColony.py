@@ -0,0 +1,141 @@
+import numpy as np
+
+from environments.ACOEnvironment import ACOEnvironment
+from helpers.Path import Path
+from helpers.PathSpecification import PathSpecification
+
+
+class AntColony:
+    """
+    A whole generation of ants, walking through the environment in lockstep.
+
+    Instead of one Ant object per agent, the colony keeps every ant in structure-of-arrays form (positions, visited
+    bitmaps, backtracking stacks and alive flags), and advances all of them at once with vectorized transition
+    probabilities and sampling. Each ant follows the same rules as Ant.find_path.
+    """
+
+    def __init__(self, environment: ACOEnvironment, path_specification: PathSpecification, num_ants: int,
+                 convergence_iter: int, trail: float, step_size: int = 1, rng=None):
+        """
+        Constructor for the colony.
+
+        :param environment: environment the ants will be running in.
+        :param path_specification: The path specification consists of a start coordinate and an end coordinate.
+        :param num_ants: How many ants walk together.
+        :param convergence_iter: Maximum number of iterations (steps or backtracks) of an ant.
+        :param trail: The exponent of the pheromones in the transition probabilities.
+        :param step_size: How many cells do the ants move in each direction.
+        :param rng: The random number generator (a numpy Generator, or the np.random module). Default: np.random
+        """
+
+        self.environment: ACOEnvironment = environment
+        self.start = path_specification.get_start()
+        self.end = path_specification.get_end()
+        self.num_ants: int = num_ants
+        self.convergence_iter: int = convergence_iter
+        self.trail: float = trail
+        self.step_size: int = step_size
+        self.rand = np.random if rng is None else rng
+
+    def find_paths(self) -> list:
+        """
+        Method that performs a single run through the environment by every ant of the colony.
+
+        :return: The path found by each ant, or None for the ants that did not reach the end.
+        """
+
+        n = self.num_ants
+        max_steps = max(self.convergence_iter, 1)
+
+        # The offsets may grow the padding, so they are computed before any cell index
+        offsets = self.environment.neighbour_offsets(self.step_size)
+        start = self.environment.cell_index(self.start)
+        end = self.environment.cell_index(self.end)
+        num_cells = self.environment.cell_count()
+
+        ants = np.arange(n)
+        position = np.full(n, start, dtype=np.int64)
+        alive = np.ones(n, dtype=bool)
+
+        # Visited cells, one bit per cell of the padded layout
+        visited = np.zeros((n, (num_cells + 7) // 8), dtype=np.uint8)
+        visited[:, start >> 3] |= np.uint8(1 << (start & 7))
+
+        # Cells of the path so far, and the decision points (cell and path length) to backtrack to
+        steps = np.empty((n, max_steps), dtype=np.int64)
+        steps[:, 0] = start
+        length = np.ones(n, dtype=np.int64)
+        stack_cell = np.empty((n, max_steps), dtype=np.int64)
+        stack_length = np.empty((n, max_steps), dtype=np.int64)
+        stack_top = np.zeros(n, dtype=np.int64)
+
+        iteration = 0
+
+        while True:
+            walking = ants[alive & (position != end)]
+            if walking.size == 0:
+                break
+
+            iteration += 1
+            if iteration >= self.convergence_iter:
+                alive[walking] = False
+                break
+
+            # Pheromones of the 8 neighbours of every walking ant, in the order of Direction
+            neighbours = position[walking, np.newaxis] + offsets
+            surrounding_pheromone = self.environment.get_cell_pheromones(neighbours)
+
+            # Only the first 7 directions are candidates, as in Ant.find_path
+            candidates = neighbours[:, :7]
+            seen = (visited[walking[:, np.newaxis], candidates >> 3] >> (candidates & 7).astype(np.uint8)) & 1
+            seen = seen.astype(bool)
+
+            seen_pheromones = np.where(seen, surrounding_pheromone[:, :7], 0).sum(axis=1)
+            tot_pheromones = surrounding_pheromone.sum(axis=1) - seen_pheromones
+            probabilities = np.where(seen, 0.0, surrounding_pheromone[:, :7] ** self.trail)
+            total = probabilities.sum(axis=1)
+
+            # Dead ends: go back to the last decision point, or give up
+            stuck = (tot_pheromones == 0) | (total == 0)
+            backtracking = walking[stuck & (stack_top[walking] > 0)]
+            alive[walking[stuck & (stack_top[walking] == 0)]] = False
+            stack_top[backtracking] -= 1
+            position[backtracking] = stack_cell[backtracking, stack_top[backtracking]]
+            length[backtracking] = stack_length[backtracking, stack_top[backtracking]]
+
+            moving = ~stuck
+            walking = walking[moving]
+            probabilities = probabilities[moving]
+            candidates = candidates[moving]
+
+            # Remember the decision points
+            deciding = walking[np.count_nonzero(probabilities, axis=1) >= 2]
+            stack_cell[deciding, stack_top[deciding]] = position[deciding]
+            stack_length[deciding, stack_top[deciding]] = length[deciding]
+            stack_top[deciding] += 1
+
+            # Sample a direction per ant following its probability distribution
+            # (the last candidate with a non-zero probability bounds the choice against rounding)
+            cumulative = np.cumsum(probabilities, axis=1)
+            threshold = self.rand.random(walking.size) * cumulative[:, -1]
+            last = 6 - np.argmax(probabilities[:, ::-1] > 0, axis=1)
+            choice = np.minimum((cumulative <= threshold[:, np.newaxis]).sum(axis=1), last)
+
+            new_position = candidates[np.arange(walking.size), choice]
+            position[walking] = new_position
+            steps[walking, length[walking]] = new_position
+            length[walking] += 1
+            visited[walking, new_position >> 3] |= (1 << (new_position & 7)).astype(np.uint8)
+
+        paths = []
+        for ant in range(n):
+            if not alive[ant]:
+                paths.append(None)
+                continue
+
+            path = Path(self.start)
+            for cell in steps[ant, 1:length[ant]]:
+                path.add(self.environment.cell_coordinate(cell))
+            paths.append(path)
+
+        return paths
@@ -2,7 +2,7 @@ import math
 import random
 import numpy as np
 
-from helpers.Levy import levy_flight
+from helpers.LevySampler import LevySampler
 
 from agents.Agent import Agent
 from environments.Environment import Environment
@@ -17,9 +17,16 @@ class Firefly(Agent):
     """
 
     def __init__(self, environment: Environment, path_specification: PathSpecification, alpha_init, alpha_end, beta,
-                 gamma_init, gamma_end, step_size: int = 1, obstacle_distance: int = 0):
+                 gamma_init, gamma_end, step_size: int = 1, obstacle_distance: int = 0, rng=None,
+                 levy: LevySampler = None):
         super().__init__(environment, path_specification, step_size)
 
+        # A numpy Generator for the Lévy flights and random moves, or None for np.random and the random module
+        self.rng = rng
+        self.rand = random if rng is None else rng
+        # The Lévy flight steps, drawn in blocks from the same generator
+        self.levy: LevySampler = LevySampler(rng) if levy is None else levy
+
         self.alpha_init = alpha_init
         self.alpha_end = alpha_end
         self.beta = beta
@@ -54,7 +61,7 @@ class Firefly(Agent):
         attractiveness = self.beta * np.exp(-gamma * (distance ** 2))
         # The following can be changed with another distribution
         # random_number = random.uniform(0, 1) - 0.5
-        random_number = levy_flight(beta=1.5, size=2)
+        random_number = self.levy.step()
 
         new_pos_x = self.current_position.x + (attractiveness * (better_position.x - self.current_position.x) +
                                                alpha * random_number[0])
@@ -69,8 +76,8 @@ class Firefly(Agent):
 
     def random_move(self, area):
         self.current_position = Coordinate(
-            random.uniform(self.current_position.x - area, self.current_position.x + area),
-            random.uniform(self.current_position.y - area, self.current_position.y + area))
+            self.rand.uniform(self.current_position.x - area, self.current_position.x + area),
+            self.rand.uniform(self.current_position.y - area, self.current_position.y + area))
 
     def reach_end(self):
         """
@@ -78,10 +85,8 @@ class Firefly(Agent):
         :return: True if the firefly has reached the end, False otherwise.
         """
 
-        if self.path.get_path()[-1].x_between(self.environment.end.x - 0.5,
-                                              self.environment.end.x + 0.5) and \
-                self.path.get_path()[-1].y_between(self.environment.end.y - 0.5,
-                                                   self.environment.end.y + 0.5):
+        if self.path.last().x_between(self.environment.end.x - 0.5, self.environment.end.x + 0.5) and \
+                self.path.last().y_between(self.environment.end.y - 0.5, self.environment.end.y + 0.5):
             self.path.add(self.environment.end)
             return True
         return False
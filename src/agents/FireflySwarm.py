@@ -0,0 +1,142 @@
+import numpy as np
+
+from environments.Environment import Environment
+from helpers.Coordinate import Coordinate
+from helpers.LevySampler import LevySampler
+from helpers.Path import Path
+from helpers.PathSpecification import PathSpecification
+
+
+class FireflySwarm:
+    """
+    A whole population of fireflies, moved at once.
+
+    The positions and intensities of the fireflies are kept in arrays. Every generation, each firefly is attracted
+    by all the brighter ones at the same time (a synchronous update, from the positions at the start of the
+    generation): the pairwise distances and attractiveness are computed by broadcasting, over blocks of rows so the
+    memory stays bounded for large populations, and the moves are applied in a single batch. Each firefly takes a
+    single move per generation, of the size of one Firefly.move_towards: the mean of its attractions, and one Lévy
+    step.
+    """
+
+    def __init__(self, environment: Environment, path_specification: PathSpecification, num_fireflies: int,
+                 alpha_init: float, alpha_end: float, beta: float, gamma_init: float, gamma_end: float,
+                 obstacle_distance: float = 0, rng=None, block_size: int = 256,
+                 levy: LevySampler = None):
+        """
+        Constructor for the swarm. Every firefly starts at the start position.
+
+        :param environment: environment the fireflies will be moving in.
+        :param path_specification: The path specification consists of a start coordinate and an end coordinate.
+        :param num_fireflies: How many fireflies the swarm has.
+        :param alpha_init: The randomness of the moves at the first generation.
+        :param alpha_end: The randomness of the moves at the last generation.
+        :param beta: The attractiveness at distance 0.
+        :param gamma_init: The light absorption at the first generation.
+        :param gamma_end: The light absorption at the last generation.
+        :param obstacle_distance: The required minimum distance of a firefly to an obstacle.
+        :param rng: The random number generator (a numpy Generator, or the np.random module). Default: np.random
+        :param block_size: How many fireflies are compared with the whole population at once.
+        :param levy: The sampler of the Lévy flight steps. Default: the power distribution, drawn from rng
+        """
+
+        self.environment: Environment = environment
+        self.alpha_init = alpha_init
+        self.alpha_end = alpha_end
+        self.beta = beta
+        self.gamma_init = gamma_init
+        self.gamma_end = gamma_end
+        self.obstacle_distance: float = obstacle_distance
+        self.rand = np.random if rng is None else rng
+        self.block_size: int = block_size
+        self.levy: LevySampler = LevySampler(rng) if levy is None else levy
+
+        start = path_specification.get_start()
+        self.positions: np.ndarray = np.tile(np.array([start.x, start.y], dtype=np.float64), (num_fireflies, 1))
+        self.paths = [Path(start) for _ in range(num_fireflies)]
+
+        # Last position of each path (random moves change the position, but do not extend the path)
+        self.path_ends: np.ndarray = self.positions.copy()
+
+        self.intensities: np.ndarray = np.empty(num_fireflies, dtype=np.float64)
+        self.update_intensities()
+
+    def move(self, adaptive: float):
+        """
+        Moves every firefly towards the brighter ones (a single move, by the mean of their attractions and one Lévy
+        step, as Firefly.move_towards moves towards one firefly), and makes the fireflies which are not brighter than
+        enough of the others wander randomly, like FireflyAlgorithm.run does one pair at a time.
+
+        :param adaptive: How far the run is, from 0 (first generation) to 1, for the adaptive parameters
+        """
+
+        alpha = self.alpha_init + adaptive * (self.alpha_end - self.alpha_init)
+        gamma = self.gamma_init + adaptive * (self.gamma_end - self.gamma_init)
+
+        n = len(self.positions)
+        displacements = np.zeros((n, 2), dtype=np.float64)
+        brighter_counts = np.zeros(n, dtype=np.int64)
+
+        for first in range(0, n, self.block_size):
+            rows = slice(first, min(n, first + self.block_size))
+
+            # (block, n) matrices of the vectors and squared distances towards every firefly, and of which are brighter
+            differences = self.positions[np.newaxis, :, :] - self.positions[rows, np.newaxis, :]
+            squared_distances = np.einsum("ijk,ijk->ij", differences, differences)
+            brighter = self.intensities[rows, np.newaxis] < self.intensities[np.newaxis, :]
+
+            attractiveness = np.where(brighter, self.beta * np.exp(-gamma * squared_distances), 0.0)
+            displacements[rows] = np.einsum("ij,ijk->ik", attractiveness, differences)
+            brighter_counts[rows] = brighter.sum(axis=1)
+
+        # The fireflies with a brighter one take a single move: the mean of their attractions, and one Lévy step
+        attracted = np.flatnonzero(brighter_counts > 0)
+        candidates = self.positions[attracted] + displacements[attracted] / brighter_counts[attracted, np.newaxis] + \
+            alpha * self.levy.steps(attracted.size)
+
+        # Only the moves to valid positions are taken, and added to the paths
+        valid = ~self.environment.agent_out_of_bounds_mask(candidates[:, 0], candidates[:, 1], self.obstacle_distance)
+        moved = attracted[valid]
+        candidates = candidates[valid]
+        self.positions[moved] = candidates
+        self.path_ends[moved] = candidates
+        for i, (x, y) in zip(moved.tolist(), candidates.tolist()):
+            self.paths[i].add(Coordinate(x, y))
+
+        # A random move for every 11 fireflies which are not brighter
+        wanders = (n - brighter_counts) // 11
+        owners = np.repeat(np.arange(n), wanders)
+        jitter = self.rand.uniform(-0.1, 0.1, size=(owners.size, 2))
+        self.positions[:, 0] += np.bincount(owners, weights=jitter[:, 0], minlength=n)
+        self.positions[:, 1] += np.bincount(owners, weights=jitter[:, 1], minlength=n)
+
+        self.update_intensities()
+
+    def update_intensities(self):
+        """
+        Updates the intensity of every firefly: the opposite of its distance to the goal, as Firefly.update_intensity.
+        """
+
+        dx = self.positions[:, 0] - self.environment.end.x
+        dy = self.positions[:, 1] - self.environment.end.y
+        self.intensities[:] = -np.sqrt(dx ** 2 + dy ** 2)
+
+    def reached_end(self) -> int:
+        """
+        Checks whether a firefly reached the end of the path (like Firefly.reach_end), and then adds the end to its
+        path.
+
+        :return: The index of the first firefly which reached the end, or None
+        """
+
+        end = np.array([self.environment.end.x, self.environment.end.y], dtype=np.float64)
+        reached = np.all((self.path_ends >= end - 0.5) & (self.path_ends < end + 0.5), axis=1)
+
+        if not reached.any():
+            return None
+
+        first = int(np.argmax(reached))
+        self.paths[first].add(self.environment.end)
+        self.path_ends[first] = end
+
+        return first
@@ -16,12 +16,15 @@ class Particle(Agent):
 
     def __init__(self, environment: Environment, path_specification: PathSpecification,
                  convergence_iter: int, trail: float, velocity_x: float, velocity_y: float, step_size: int = 1,
-                 inertia_weight: float = 1.0):
+                 inertia_weight: float = 1.0, rng=None, start_fitness: float = math.inf):
         super().__init__(environment, path_specification, step_size)
 
         self.personal_best_pos = self.current_position  # Initially personal best is start
+        # Fitness of the personal best, kept with it so it is only evaluated once
+        self.personal_best_fitness: float = start_fitness
         self.current_position = self.current_position  # Get rid of warnings
-        self.rand = random
+        # The random module, or a numpy Generator (both have uniform)
+        self.rand = random if rng is None else rng
         self.convergence_iter = convergence_iter
         self.trail = trail
         # A particle is defined by its position and velocity,
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+
+from environments.Environment import Environment
+from helpers.LevySampler import LevySampler
+from helpers.PathSpecification import PathSpecification
+
+
+class ParticleSwarm:
+    """
+    A whole swarm of particles, updated at once.
+
+    Instead of one Particle object per agent, the swarm keeps the positions, velocities and personal bests of every
+    particle in (N, 2) arrays, so each step of the algorithm is a few array operations over the whole swarm. Each
+    particle follows the same rules as Particle.update_particle: like it, a particle only has to stay clear of the
+    obstacles themselves, not of the algorithm's obstacle distance.
+    """
+
+    def __init__(self, environment: Environment, path_specification: PathSpecification, num_particles: int,
+                 fitness, rng=None, levy: LevySampler = None):
+        """
+        Constructor for the swarm. Every particle starts at the start position, with a random velocity.
+
+        :param environment: environment the particles will be moving in.
+        :param path_specification: The path specification consists of a start coordinate and an end coordinate.
+        :param num_particles: How many particles the swarm has.
+        :param fitness: Function computing the fitness (to minimize) of an (N, 2) array of positions.
+        :param rng: The random number generator (a numpy Generator, or the np.random module). Default: np.random
+        :param levy: The sampler of the Lévy flight steps. Default: the power distribution, drawn from rng
+        """
+
+        self.environment: Environment = environment
+        self.fitness = fitness
+        self.rand = np.random if rng is None else rng
+        self.levy: LevySampler = LevySampler(rng) if levy is None else levy
+
+        start = path_specification.get_start()
+        self.positions: np.ndarray = np.tile(np.array([start.x, start.y], dtype=np.float64), (num_particles, 1))
+        self.velocities: np.ndarray = self.rand.uniform(-1, 1, size=(num_particles, 2))
+
+        # Initially the personal best of every particle is the start
+        self.personal_best: np.ndarray = self.positions.copy()
+        self.personal_best_fitness: np.ndarray = self.fitness(self.personal_best)
+
+    def update(self, global_best: np.ndarray, c1: float, c2: float, curr_iter: int, iter_max: int):
+        """
+        Updates the velocities and positions of all the particles. Particles whose new position would be out of
+        bounds or inside an obstacle keep their position and velocity.
+
+        :param global_best: The (x, y) global best position
+        :param c1: The cognitive coefficient
+        :param c2: The social coefficient
+        :param curr_iter: The current iteration
+        :param iter_max: The maximum number of iterations
+        """
+
+        # Random coefficients r1, r2, one pair per particle
+        r1 = self.rand.random((len(self.positions), 1))
+        r2 = self.rand.random((len(self.positions), 1))
+
+        # The inertia weight is the same for the whole swarm
+        if c1 >= c2:
+            w = math.exp(((c1 - c2) / (c1 + c2)) * (curr_iter / iter_max)) - 0.2
+        else:
+            w = (1 / 3) * (c1 / c2) * (iter_max / curr_iter)
+
+        # Update the velocities, clamped to [-2, 2], and only keep the moves to valid positions
+        velocities = (w * self.velocities + c1 * r1 * (self.personal_best - self.positions)
+                      + c2 * r2 * (global_best - self.positions))
+        np.clip(velocities, -2, 2, out=velocities)
+        positions = self.positions + velocities
+
+        valid = ~self.environment.agent_out_of_bounds_mask(positions[:, 0], positions[:, 1])
+        self.velocities[valid] = velocities[valid]
+        self.positions[valid] = positions[valid]
+
+    def levy_flight(self):
+        """
+        Moves all the particles with a Lévy flight, to get them out of poor areas. The flight is taken along each
+        axis that stays within bounds, and only if the destination does not collide with an obstacle.
+        """
+
+        steps = self.levy.steps(len(self.positions))
+        destinations = self.positions + steps
+
+        free = self.environment.distances_to_closest_obstacle(destinations[:, 0], destinations[:, 1]) > 0
+        upper = np.array([self.environment.width - 1, self.environment.height - 1])
+        allowed = free[:, np.newaxis] & (destinations >= 0) & (destinations <= upper)
+
+        self.positions[allowed] = destinations[allowed]
+        self.velocities[allowed] = steps[allowed]
+
+    def update_bests(self) -> (int, float):
+        """
+        Evaluates the fitness of all the particles, and updates their personal bests.
+
+        :return: The index of the (first) particle with the best fitness, and that fitness
+        """
+
+        fitness = self.fitness(self.positions)
+
+        improved = fitness < self.personal_best_fitness
+        self.personal_best[improved] = self.positions[improved]
+        self.personal_best_fitness[improved] = fitness[improved]
+
+        best = int(np.argmin(fitness))
+
+        return best, fitness.item(best)
@@ -1,13 +1,14 @@
-import random
-
 from algorithms.Algorithm import Algorithm
 from environments.ACOEnvironment import ACOEnvironment
 from agents.Ant import Ant
-from multiprocessing import Pool
-
+from agents.AntColony import AntColony
 from environments.Environment import Environment
+from helpers.Executor import Executor
 from helpers.Path import Path
 from helpers.PathSpecification import PathSpecification
+from helpers.ProcessExecutor import ProcessExecutor
+from helpers.RandomStreams import RandomStreams
+from helpers.SerialExecutor import SerialExecutor
 
 
 class AdpeAntColonyOptimization(Algorithm):
@@ -22,12 +23,21 @@ class AdpeAntColonyOptimization(Algorithm):
     algorithm.
     """
 
+    # Number of ants of each colony, in batched mode
+    COLONY_SIZE = 64
+
+    PARAMETERS = Algorithm.PARAMETERS + ("ants_per_gen", "generations", "q", "evaporation", "convergence_iter",
+                                         "no_change_iter", "trail", "batched", "sigma_elite",
+                                         "default_elitist_probability")
+    STATE = ("maximum_global_tour_length",)
+
     def __init__(self, environment: Environment, ants_per_gen: int, generations: int, q: int, evaporation: float,
                  convergence_iter: int, no_change_iter: int, trail: float, sigma_elite: int,
                  default_elitist_probability: float = 0.5, step_size: int = 1, num_processes: int = 6,
-                 obstacle_distance: int = 0):
-        super().__init__(environment, step_size, obstacle_distance)
-        self.environment: ACOEnvironment = ACOEnvironment.create_from_environment(self.environment)
+                 obstacle_distance: int = 0, lazy_evaporation: bool = False, batched: bool = False,
+                 executor: Executor = None, shared_memory: bool = True, seed=None):
+        super().__init__(environment, step_size, obstacle_distance, seed)
+        self.environment: ACOEnvironment = ACOEnvironment.create_from_environment(self.environment, lazy_evaporation)
         self.ants_per_gen: int = ants_per_gen
         self.generations: int = generations
         self.q: int = q
@@ -36,6 +46,9 @@ class AdpeAntColonyOptimization(Algorithm):
         self.no_change_iter: int = no_change_iter
         self.trail: float = trail
         self.num_processes: int = num_processes
+        self.batched: bool = batched
+        self.executor: Executor = executor
+        self.shared_memory: bool = shared_memory
         self.sigma_elite: int = sigma_elite
         self.default_elitist_probability: float = default_elitist_probability
         self.maximum_global_tour_length = None
@@ -56,76 +69,143 @@ class AdpeAntColonyOptimization(Algorithm):
         """
 
         self.environment.reset()
+        streams = self.run_streams()
+        elitism_rng = streams.generator("elitism")
 
         best_path: Path = None
         count = 0
-        checkpoints = []
+        trace = self.start_trace(self.generations)
+        evaluations = 0
 
-        for generation in range(self.generations):
-            if print_progress:
-                print("Generation", generation)
+        # The padding has to fit the step size before the environment is handed over to the executor
+        self.environment.neighbour_offsets(self.step_size)
 
-            # We introduce multi-threading
-            # Basically, each ant compute their shortest path on a separate thread
-            # This way, more ants are deployed to find paths (hence, the better our algorithm will be)
-            with Pool(self.num_processes) as p:
-                paths = p.map(self.run_parallel, [path_specification] * self.ants_per_gen)
+        # We introduce multi-processing
+        # Basically, the ants compute their shortest paths on separate processes
+        # This way, more ants are deployed to find paths (hence, the better our algorithm will be)
+        # The ants of every generation run on the same executor (and the same pool of processes)
+        executor = self.executor
+        if executor is None:
+            executor = SerialExecutor() if self.batched else ProcessExecutor(self.num_processes)
 
-            paths = [r for r in paths if r is not None]
+        # Worker processes read the pheromones from shared memory, which is updated in place
+        if self.shared_memory and not executor.shares_state:
+            self.environment.share_memory()
+
+        executor.start(self)
+
+        try:
+            for generation in range(self.generations):
+                if print_progress:
+                    print("Generation", generation)
 
-            prev = best_path
+                generation_streams = streams.child("generation", generation)
+                paths = [r for r in self.find_paths(executor, path_specification, generation_streams) if r is not None]
+                evaluations += self.ants_per_gen
 
-            for path in paths:
-                if best_path is None:
-                    best_path = path
-                if path.shorter_than(best_path):
-                    best_path = path
+                prev = best_path
 
-            # We get the longest path for the probabilistic Elitism
-            if self.maximum_global_tour_length is None:
-                self.maximum_global_tour_length = best_path.size()
+                for path in paths:
+                    if best_path is None:
+                        best_path = path
+                    if path.shorter_than(best_path):
+                        best_path = path
 
-            if best_path is not None and prev is not None and prev == best_path:
-                count += 1
-            else:
-                count = 0
+                # We get the longest path for the probabilistic Elitism
+                if self.maximum_global_tour_length is None:
+                    self.maximum_global_tour_length = best_path.size()
 
-            if print_progress:
-                print("Paths found so far:", len(paths))
-                if best_path is not None:
-                    print("Best path's length:", best_path.size())
-                print("\n")
+                if best_path is not None and prev is not None and prev == best_path:
+                    count += 1
+                else:
+                    count = 0
 
-            if count >= self.no_change_iter:
                 if print_progress:
-                    print("No change for many generations")
-                return best_path, checkpoints
+                    print("Paths found so far:", len(paths))
+                    if best_path is not None:
+                        print("Best path's length:", best_path.size())
+                    print("\n")
 
-            if len(paths) == 0:
-                continue
+                trace.record(generation, None if best_path is None else best_path.size(), evaluations, len(paths))
 
-            self.environment.evaporate(self.evaporation)
+                if count >= self.no_change_iter:
+                    if print_progress:
+                        print("No change for many generations")
+                    return best_path, trace.checkpoints()
 
-            self.environment.add_pheromone_paths(paths, self.q)
+                if len(paths) == 0:
+                    continue
+
+                self.environment.evaporate(self.evaporation)
+
+                # Performance Improvement: Adding the pheromones of the best path using elitism
+                # We use Probabilistic Elitism, where we add the pheromones of the best path with a certain probability
+                # This reduces the chance of the algorithm getting stuck in a
+                # local minimum with respect to the original elitist algorithm
+                p: float = 1 - best_path.size() / self.maximum_global_tour_length
+                if p < 0:
+                    p = self.default_elitist_probability
+
+                if elitism_rng.random() < p:
+                    paths = paths + [best_path] * self.sigma_elite
+
+                # All the deposits of the generation are done at once
+                self.environment.add_pheromone_paths(paths, self.q)
+
+            return best_path, trace.checkpoints()
+        finally:
+            if self.executor is None:
+                executor.close()
+
+    def find_paths(self, executor: Executor, path_specification: PathSpecification, streams: RandomStreams) -> list:
+        """
+        Lets the ants of one generation find their paths, split in one task per worker of the executor (or in
+        colonies of COLONY_SIZE ants, in batched mode).
+
+        Executors that do not share the algorithm with the tasks get the pheromone changes since the last reset
+        along with each task, instead of the whole environment, unless the pheromones are in shared memory.
+
+        Each ant (or colony) has its own random stream, so the paths do not depend on how the ants are split.
+
+        :param executor: The executor running the ants, started with this algorithm
+        :param path_specification: The start and end coordinates of the path
+        :param streams: The random streams of the generation
+        :return: The path found by each ant, or None for the ants that did not reach the end
+        """
+
+        shared = executor.shares_state or self.environment.shared
+        update = None if shared else self.environment.pheromone_update()
+
+        group = self.COLONY_SIZE if self.batched else -(-self.ants_per_gen // executor.workers)
+        tasks = [(update, path_specification, streams, first, min(group, self.ants_per_gen - first))
+                 for first in range(0, self.ants_per_gen, group)]
+
+        return [path for paths in executor.map(AdpeAntColonyOptimization.walk, tasks) for path in paths]
+
+    def walk(self, task) -> list:
+        """
+        Runs a group of ants, which is a task of find_paths.
+
+        In batched mode the ants walk in lockstep (see AntColony), otherwise one after the other.
+
+        :param task: The pheromone update (or None), the path specification, the random streams of the generation,
+                     the index of the first ant and the number of ants
+        :return: The path found by each ant, or None for the ants that did not reach the end
+        """
 
-            # Performance Improvement: Adding the pheromones of the best path using elitism
-            # We use Probabilistic Elitism, where we add the pheromones of the best path with a certain probability
-            # This reduces the chance of the algorithm getting stuck in a
-            # local minimum with respect to the original elitist algorithm
-            p: float = 1 - best_path.size() / self.maximum_global_tour_length
-            if p < 0:
-                p = self.default_elitist_probability
+        update, path_specification, streams, first, num_ants = task
 
-            if random.random() < p:
-                for i in range(self.sigma_elite):
-                    self.environment.add_pheromone_path(best_path, self.q)
+        if update is not None:
+            self.environment.apply_pheromone_update(update)
 
-            if (generation + 1) == 1 or (generation + 1) == 3 or (generation + 1) == 5 \
-                    or (generation + 1) == 9 or (generation + 1) % 10 == 0:
-                checkpoints.append(best_path.size())
+        if self.batched:
+            colony = AntColony(self.environment, path_specification, num_ants, self.convergence_iter, self.trail,
+                               self.step_size, streams.generator("colony", first))
+            return colony.find_paths()
 
-        return best_path, checkpoints
+        return [self.run_parallel(path_specification, streams.generator("ant", ant))
+                for ant in range(first, first + num_ants)]
 
-    def run_parallel(self, path_specification):
-        ant = Ant(self.environment, path_specification, self.convergence_iter, self.trail, self.step_size)
+    def run_parallel(self, path_specification, rng=None):
+        ant = Ant(self.environment, path_specification, self.convergence_iter, self.trail, self.step_size, rng)
         return ant.find_path()
@@ -1,17 +1,123 @@
+import time
+
 from environments.Environment import Environment
+from helpers.ConvergenceTrace import ConvergenceTrace
+from helpers.Fingerprint import fingerprint
 from helpers.Path import Path
 from helpers.PathSpecification import PathSpecification
+from helpers.RandomStreams import RandomStreams
+from helpers.RunCache import RunCache
 
 
 class Algorithm:
     """
     An abstract class for all algorithms to inherit from.
+
+    All the randomness of an algorithm comes from its random streams: with the same seed, the same sequence of runs
+    gives the same results, whatever the number of processes used.
     """
 
-    def __init__(self, environment: Environment, step_size: int, obstacle_distance: int = 0):
+    # The attributes which change the results of the runs (the ones which only change how a run is executed, like
+    # the executor or the number of processes, are left out, so they do not change the fingerprint)
+    PARAMETERS = ("step_size", "obstacle_distance", "trace_generations", "trace_period")
+    # The attributes kept from one run to the next, which change the results of the next runs as well
+    STATE = ()
+
+    def __init__(self, environment: Environment, step_size: int, obstacle_distance: int = 0, seed=None):
         self.environment = environment
         self.step_size = step_size
         self.obstacle_distance = obstacle_distance
+        self.random_streams: RandomStreams = RandomStreams(seed)
+
+        # The generations at which the runs record their convergence (see ConvergenceTrace)
+        self.trace_generations = ConvergenceTrace.GENERATIONS
+        self.trace_period: int = ConvergenceTrace.PERIOD
+        # The convergence trace of the last run
+        self.trace: ConvergenceTrace = None
+
+    def run_streams(self) -> RandomStreams:
+        """
+        :return: The random streams of a new run (independent from the ones of the previous runs)
+        """
+
+        return self.random_streams.spawn()
+
+    def start_trace(self, max_generations: int) -> ConvergenceTrace:
+        """
+        :param max_generations: The maximum number of generations of the run
+        :return: The convergence trace of a new run, which becomes the trace of the algorithm
+        """
+
+        self.trace = ConvergenceTrace(max_generations, self.trace_generations, self.trace_period)
+
+        return self.trace
+
+    def parameters(self) -> dict:
+        """
+        :return: The parameters of the algorithm (see PARAMETERS), with the state kept from one run to the next
+        """
+
+        return {name: getattr(self, name) for name in self.PARAMETERS + self.STATE}
+
+    def state(self) -> dict:
+        """
+        :return: The state kept from one run to the next (see STATE)
+        """
+
+        return {name: getattr(self, name) for name in self.STATE}
+
+    def fingerprint(self) -> str:
+        """
+        :return: A stable fingerprint of the class and the parameters of the algorithm
+        """
+
+        return fingerprint(type(self).__name__, self.parameters())
+
+    def run_fingerprint(self, path_specification: PathSpecification) -> str:
+        """
+        :param path_specification: The start and end coordinates of the path
+        :return: A stable fingerprint of the next run: the version of the cached runs, the algorithm, the
+        environment, the path specification, and the seed of the random streams the run will get
+        """
+
+        seed_sequence = self.random_streams.seed_sequence
+        run_seed = (seed_sequence.entropy, seed_sequence.spawn_key + (seed_sequence.n_children_spawned,))
+
+        return fingerprint(RunCache.VERSION, self.fingerprint(), self.environment.fingerprint(),
+                           path_specification.start, path_specification.end, run_seed)
+
+    def cached_run(self, path_specification: PathSpecification, cache: RunCache = None,
+                   print_progress: bool = False) -> (Path, list):
+        """
+        Same as run, but takes the path, the trace and the state of the algorithm after the run from the cache, if
+        an identical run is cached, and caches them otherwise. The total time of the run is kept in the trace.
+
+        :param path_specification: The start and end coordinates of the path
+        :param cache: The cache of the runs, or None to always run
+        :param print_progress: Whether we print the result of each generation (only when actually running)
+
+        :return: The best path found and a list of checkpoints
+        """
+
+        key = None if cache is None else self.run_fingerprint(path_specification)
+        cached = None if cache is None else cache.get(key)
+
+        if cached is not None:
+            # The random streams of the run are used up, as if it was done
+            self.run_streams()
+            path, self.trace, state = cached
+            for name, value in state.items():
+                setattr(self, name, value)
+            return path, self.trace.checkpoints()
+
+        start = time.perf_counter()
+        path, checkpoints = self.run(path_specification, print_progress)
+        self.trace.runtime = time.perf_counter() - start
+
+        if cache is not None:
+            cache.put(key, (path, self.trace, self.state()))
+
+        return path, checkpoints
 
     def run(self, path_specification: PathSpecification, print_progress: bool = True) -> (Path, list):
         """
@@ -20,7 +126,7 @@ class Algorithm:
         :param path_specification: The start and end coordinates of the path
         :param print_progress: Whether we print the result of each generation
 
-        :return: The best path found and a list of checkpoints
+        :return: The best path found and a list of checkpoints (the best path lengths recorded in the trace)
         """
 
         raise NotImplementedError
@@ -1,6 +1,10 @@
+import numpy as np
+
 from algorithms.Algorithm import Algorithm
 from environments.Environment import Environment
 from agents.Firefly import Firefly
+from agents.FireflySwarm import FireflySwarm
+from helpers.LevySampler import LevySampler
 from helpers.PathSpecification import PathSpecification
 from helpers.Path import Path
 
@@ -18,13 +22,20 @@ class FireflyAlgorithm(Algorithm):
     are drawn from a Lévy distribution. This allows the fireflies to explore the search space more effectively.
     """
 
+    # Number of fireflies compared with the whole population at once, in vectorized mode
+    BLOCK_SIZE = 256
+
+    PARAMETERS = Algorithm.PARAMETERS + ("max_iter", "population_size", "alpha_init", "alpha_end", "gamma_init",
+                                         "gamma_end", "beta", "vectorized", "levy_method")
+
     def __init__(self, environment: Environment, population_size,
                  alpha_init: float = 1.0, alpha_end: float = 0.1, gamma_init: float = 0.1, gamma_end: float = 5,
-                 beta=1, max_iter=100, step_size: int = 1, obstacle_distance: int = 0):
+                 beta=1, max_iter=100, step_size: int = 1, obstacle_distance: int = 0, seed=None,
+                 vectorized: bool = False, levy_method: str = "power"):
         assert gamma_init < gamma_end, "Gamma init must be smaller than gamma end"
         assert alpha_init > alpha_end, "Alpha init must be greater than alpha end"
 
-        super().__init__(environment, step_size, obstacle_distance)
+        super().__init__(environment, step_size, obstacle_distance, seed)
         self.max_iter = max_iter
         self.population_size = population_size
         self.alpha_init = alpha_init
@@ -32,6 +43,10 @@ class FireflyAlgorithm(Algorithm):
         self.gamma_init = gamma_init
         self.gamma_end = gamma_end
         self.beta = beta
+        # Whether all the fireflies move at once each generation (see FireflySwarm), instead of one pair at a time
+        self.vectorized: bool = vectorized
+        # The distribution of the Lévy flight steps (see LevySampler)
+        self.levy_method: str = levy_method
 
     def run(self, path_specification: PathSpecification, print_progress: bool = True) -> (Path, list):
         """
@@ -42,16 +57,26 @@ class FireflyAlgorithm(Algorithm):
 
         :return: The best path found and a list of checkpoints
         """
+
+        if self.vectorized:
+            return self.run_vectorized(path_specification, print_progress)
+
         # Initialize variables
         path_specification = path_specification
         path = Path(path_specification.start)
 
+        streams = self.run_streams()
+
         best = None
-        fireflies = [
-            Firefly(self.environment, path_specification, self.alpha_init, self.alpha_end, self.beta, self.gamma_init,
-                    self.gamma_end, self.step_size, self.obstacle_distance) for _ in range(self.population_size)]
+        fireflies = []
+        for i in range(self.population_size):
+            rng = streams.generator("firefly", i)
+            fireflies.append(Firefly(self.environment, path_specification, self.alpha_init, self.alpha_end, self.beta,
+                                     self.gamma_init, self.gamma_end, self.step_size, self.obstacle_distance, rng,
+                                     LevySampler(rng, method=self.levy_method)))
 
-        checkpoints = []
+        trace = self.start_trace(self.max_iter)
+        evaluations = len(fireflies)
 
         if not best or (fireflies[0].intensity > best):
             best = fireflies[0].intensity
@@ -76,13 +101,11 @@ class FireflyAlgorithm(Algorithm):
                         const_count += 1
 
                     fireflies[i].update_intensity()
-
-                    if (generation + 1) == 1 or (generation + 1) == 3 or (generation + 1) == 5 \
-                            or (generation + 1) == 9 or (generation + 1) % 10 == 0:
-                        checkpoints.append(path.size())
+                    evaluations += 1
 
                     if fireflies[i].reach_end():
-                        return fireflies[i].path, checkpoints
+                        trace.record(generation, fireflies[i].path.size(), evaluations, 1)
+                        return fireflies[i].path, trace.checkpoints()
 
                     if fireflies[i].intensity > best:
                         best = fireflies[i].intensity
@@ -90,4 +113,51 @@ class FireflyAlgorithm(Algorithm):
                         if print_progress:
                             print(fireflies[i].intensity)
 
-        return path, checkpoints
+            # Once per generation, after all the fireflies moved
+            trace.record(generation, path.size(), evaluations, 0)
+
+        return path, trace.checkpoints()
+
+    def run_vectorized(self, path_specification: PathSpecification, print_progress: bool = True) -> (Path, list):
+        """
+        The Firefly Algorithm with all the fireflies moving at once each generation, from the positions at the start
+        of the generation.
+
+        :param path_specification: The start and end coordinates of the path
+        :param print_progress: Whether we print the result of each generation
+
+        :return: The best path found and a list of checkpoints
+        """
+
+        # Initialize variables
+        streams = self.run_streams()
+        swarm_rng = streams.generator("swarm")
+        swarm = FireflySwarm(self.environment, path_specification, self.population_size, self.alpha_init,
+                             self.alpha_end, self.beta, self.gamma_init, self.gamma_end, self.obstacle_distance,
+                             swarm_rng, self.BLOCK_SIZE, LevySampler(swarm_rng, method=self.levy_method))
+        path = Path(path_specification.start)
+        best = swarm.intensities.item(0)
+
+        trace = self.start_trace(self.max_iter)
+        evaluations = self.population_size
+
+        for generation in range(self.max_iter):
+            swarm.move(generation / self.max_iter)
+            evaluations += self.population_size
+
+            reached = swarm.reached_end()
+            if reached is not None:
+                trace.record(generation, swarm.paths[reached].size(), evaluations, 1)
+                return swarm.paths[reached], trace.checkpoints()
+
+            # We want to maximize the brightness (i.e. minimize distance to goal)
+            brightest = int(np.argmax(swarm.intensities))
+            if swarm.intensities[brightest] > best:
+                best = swarm.intensities.item(brightest)
+                path = swarm.paths[brightest]
+                if print_progress:
+                    print(best)
+
+            trace.record(generation, path.size(), evaluations, 0)
+
+        return path, trace.checkpoints()
@@ -1,11 +1,13 @@
 import math
-import random
+
+import numpy as np
 
 from agents.Particle import Particle
+from agents.ParticleSwarm import ParticleSwarm
 from algorithms.Algorithm import Algorithm
 from environments.Environment import Environment
 from helpers.Coordinate import Coordinate
-from helpers.Levy import levy_flight
+from helpers.LevySampler import LevySampler
 from helpers.Path import Path
 from helpers.PathSpecification import PathSpecification
 
@@ -24,16 +26,28 @@ class ParticleSwarmOptimization(Algorithm):
     This allows the particles to explore the search space more effectively.
     """
 
+    # Weights of the distance to the goal and of the (inverted) distance to the nearest obstacle in the fitness
+    # For now, only the goal distance is considered
+    GOAL_WEIGHT: float = 1.0
+    OBSTACLE_WEIGHT: float = 0.0
+
+    PARAMETERS = Algorithm.PARAMETERS + ("num_particles", "max_iter", "convergence_iter", "trail", "inertia_weight",
+                                         "vectorized", "levy_method")
+
     def __init__(self, environment: Environment, num_particles: int,
                  convergence_iter: int, trail: float, step_size: int, inertia_weight: float, max_iter: int = 100,
-                 obstacle_distance: int = 0):
-        super().__init__(environment, step_size, obstacle_distance)
+                 obstacle_distance: int = 0, seed=None, vectorized: bool = False, levy_method: str = "power"):
+        super().__init__(environment, step_size, obstacle_distance, seed)
 
         self.num_particles = num_particles
         self.max_iter = max_iter
         self.convergence_iter = convergence_iter
         self.trail = trail
         self.inertia_weight = inertia_weight
+        # Whether the whole swarm is updated at once (see ParticleSwarm), instead of one particle at a time
+        self.vectorized: bool = vectorized
+        # The distribution of the Lévy flight steps (see LevySampler)
+        self.levy_method: str = levy_method
 
     def run(self, path_specification: PathSpecification, print_progress: bool = True) -> (Path, list):
         """
@@ -45,22 +59,32 @@ class ParticleSwarmOptimization(Algorithm):
         :return: The best path found and a list of checkpoints
         """
 
+        if self.vectorized:
+            return self.run_vectorized(path_specification, print_progress)
+
         # Initialize variables
+        streams = self.run_streams()
+        swarm_rng = streams.generator("swarm")
+        levy = LevySampler(swarm_rng, method=self.levy_method)
         particles = []
         global_best_pos = path_specification.start
+        # Fitness of the global best, kept with it so it is only evaluated once
+        global_best_fitness = self.evaluate_fitness(global_best_pos)
         levy_best = path_specification.start
         path = Path(path_specification.start)
 
         # Initialize particles with random velocities
-        for _ in range(self.num_particles):
-            velocity_x = random.uniform(-1, 1)
-            velocity_y = random.uniform(-1, 1)
+        for i in range(self.num_particles):
+            velocity_x = swarm_rng.uniform(-1, 1)
+            velocity_y = swarm_rng.uniform(-1, 1)
             particle = Particle(self.environment, path_specification, self.convergence_iter, self.trail, velocity_x,
                                 velocity_y,
-                                self.step_size, self.inertia_weight)
+                                self.step_size, self.inertia_weight, streams.generator("particle", i),
+                                global_best_fitness)
             particles.append(particle)
 
-        checkpoints = []
+        trace = self.start_trace(self.max_iter)
+        evaluations = 1
 
         const_count: int = 0
 
@@ -81,46 +105,125 @@ class ParticleSwarmOptimization(Algorithm):
             if levy_best == global_best_pos:
                 const_count += 1
                 if const_count > 10:
-                    # Do Lévy flight
-                    for particle in particles:
-                        levy_steps = levy_flight(beta=1.5, size=2)
-                        levy_vel_x = levy_steps[0]
-                        levy_vel_y = levy_steps[1]
-                        levy_pos = Coordinate(particle.current_position.x + levy_vel_x,
-                                              particle.current_position.y + levy_vel_y)
+                    # Do Lévy flight, checking all the particles' destinations with a single batched query
+                    levy_steps = levy.steps(len(particles))
+                    levy_xs = np.array([particle.current_position.x for particle in particles]) + levy_steps[:, 0]
+                    levy_ys = np.array([particle.current_position.y for particle in particles]) + levy_steps[:, 1]
+                    levy_free = self.environment.distances_to_closest_obstacle(levy_xs, levy_ys) > 0
 
+                    for particle, (levy_vel_x, levy_vel_y), levy_x, levy_y, free in \
+                            zip(particles, levy_steps, levy_xs, levy_ys, levy_free):
                         # Take the direction that is allowed
-                        if self.environment.distance_to_closest_obstacle(levy_pos) > 0:
-                            if 0 <= levy_pos.x <= self.environment.width - 1:
-                                particle.current_position.x = levy_pos.x
+                        # The position is replaced rather than modified, as it may be shared with the bests
+                        if free:
+                            new_x = particle.current_position.x
+                            new_y = particle.current_position.y
+                            if 0 <= levy_x <= self.environment.width - 1:
+                                new_x = levy_x
                                 particle.velocity_x = levy_vel_x
-                            if 0 <= levy_pos.y <= self.environment.height - 1:
-                                particle.current_position.y = levy_pos.y
+                            if 0 <= levy_y <= self.environment.height - 1:
+                                new_y = levy_y
                                 particle.velocity_y = levy_vel_y
+                            particle.current_position = Coordinate(new_x, new_y)
             else:
                 # Reset count and levy best
                 const_count = 0
                 levy_best = global_best_pos
 
-            # Calculate particle fitness values, update personal bests and global best
-            for particle in particles:
-                fitness: float = self.evaluate_fitness(particle.current_position)
-                fitness_pb: float = self.evaluate_fitness(particle.personal_best_pos)
-                fitness_gb: float = self.evaluate_fitness(global_best_pos)
+            # Calculate particle fitness values (the bests keep theirs), update personal bests and global best
+            positions = np.array([(particle.current_position.x, particle.current_position.y)
+                                  for particle in particles], dtype=np.float64)
+            fitnesses = self.evaluate_fitnesses(positions)
+            evaluations += len(particles)
 
-                if fitness < fitness_pb:
+            for particle, fitness in zip(particles, fitnesses.tolist()):
+                if fitness < particle.personal_best_fitness:
                     particle.personal_best_pos = particle.current_position
-                if fitness < fitness_gb:
-                    global_best_pos = particle.current_position
+                    particle.personal_best_fitness = fitness
+
+            # The first particle with the lowest fitness, as the one a particle by particle update would keep
+            best = int(np.argmin(fitnesses))
+            if fitnesses[best] < global_best_fitness:
+                global_best_pos = particles[best].current_position
+                global_best_fitness = fitnesses.item(best)
 
             # Add global best to the path
             path.add(global_best_pos)
             if print_progress:
                 print(global_best_pos)
 
-            if (generation + 1) == 1 or (generation + 1) == 3 or (generation + 1) == 5 \
-                    or (generation + 1) == 9 or (generation + 1) % 10 == 0:
-                checkpoints.append(path.size())
+            # Check termination conditions (global best at end position)
+            # We want to see if the global best is within 0.5
+            # (safe margin) of the end position set the global best to end, append end to path and stop
+            if global_best_pos.x_between(self.environment.end.x - 0.5, self.environment.end.x + 0.5) and \
+                    global_best_pos.y_between(self.environment.end.y - 0.5, self.environment.end.y + 0.5):
+                path.add(self.environment.end)
+                trace.record(generation, path.size(), evaluations, 1)
+                return path, trace.checkpoints()
+
+            trace.record(generation, path.size(), evaluations, 0)
+
+        return path, trace.checkpoints()
+
+    def run_vectorized(self, path_specification: PathSpecification, print_progress: bool = True) -> (Path, list):
+        """
+        The same algorithm as run, with the whole swarm updated at once.
+
+        :param path_specification: The start and end coordinates of the path
+        :param print_progress: Whether we print the result of each generation
+
+        :return: The best path found and a list of checkpoints
+        """
+
+        # Initialize variables
+        streams = self.run_streams()
+        swarm_rng = streams.generator("swarm")
+        swarm = ParticleSwarm(self.environment, path_specification, self.num_particles, self.evaluate_fitnesses,
+                              swarm_rng, LevySampler(swarm_rng, method=self.levy_method))
+        global_best_pos = path_specification.start
+        global_best = np.array([global_best_pos.x, global_best_pos.y], dtype=np.float64)
+        global_best_fitness = self.evaluate_fitness(global_best_pos)
+        levy_best = global_best_pos
+        path = Path(path_specification.start)
+
+        trace = self.start_trace(self.max_iter)
+        evaluations = 1
+
+        const_count: int = 0
+
+        for generation in range(self.max_iter):
+            # Get the coefficients c1 and c2 based on iteration
+            c1: float = (math.cos((math.pi / 2) * (generation / self.max_iter)) *
+                         math.cos(math.pi * (generation / self.max_iter)) + 1.5)
+            c2: float = (math.sin((math.pi / 2) * (generation / self.max_iter)) *
+                         math.sin(math.pi * ((generation / self.max_iter) + 1.5)) + 1.5)
+
+            # Update the speeds and positions of particles
+            swarm.update(global_best, c1, c2, generation, self.max_iter)
+
+            # Check if the particles have fallen into poor areas and get them out with Lévy flight
+            # The particles are judged to have fallen into a poor area if they do not change in more than 10 iters
+            if levy_best == global_best_pos:
+                const_count += 1
+                if const_count > 10:
+                    swarm.levy_flight()
+            else:
+                # Reset count and levy best
+                const_count = 0
+                levy_best = global_best_pos
+
+            # Calculate particle fitness values, update personal bests and global best
+            best, best_fitness = swarm.update_bests()
+            evaluations += self.num_particles
+            if best_fitness < global_best_fitness:
+                global_best = swarm.positions[best].copy()
+                global_best_fitness = best_fitness
+                global_best_pos = Coordinate(*global_best.tolist())
+
+            # Add global best to the path
+            path.add(global_best_pos)
+            if print_progress:
+                print(global_best_pos)
 
             # Check termination conditions (global best at end position)
             # We want to see if the global best is within 0.5
@@ -128,19 +231,36 @@ class ParticleSwarmOptimization(Algorithm):
             if global_best_pos.x_between(self.environment.end.x - 0.5, self.environment.end.x + 0.5) and \
                     global_best_pos.y_between(self.environment.end.y - 0.5, self.environment.end.y + 0.5):
                 path.add(self.environment.end)
-                return path, checkpoints
+                trace.record(generation, path.size(), evaluations, 1)
+                return path, trace.checkpoints()
+
+            trace.record(generation, path.size(), evaluations, 0)
 
-        return path, checkpoints
+        return path, trace.checkpoints()
 
     def evaluate_fitness(self, pos: Coordinate):
         # Minimize the distance to the goal but maximize the distance to the nearest obstacle
         distance_to_goal = math.sqrt((pos.x - self.environment.end.x) ** 2 + (pos.y - self.environment.end.y) ** 2)
         distance_to_obstacle = self.environment.distance_to_closest_obstacle(pos)
 
-        # For now, we assign weight 1 to the goal distance and 0 to the obstacle distance
-        # effectively only the goal distance is considered
-        weight_goal: float = 1.0
-        weight_obstacle: float = 0.0
-
         # Since we need to maximize one and minimize the other, we invert distance to an obstacle, so we can minimize it
-        return weight_goal * distance_to_goal + weight_obstacle * (1 / distance_to_obstacle)
+        return self.GOAL_WEIGHT * distance_to_goal + self.OBSTACLE_WEIGHT * (1 / distance_to_obstacle)
+
+    def evaluate_fitnesses(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Batched version of evaluate_fitness.
+
+        :param positions: An (N, 2) array of positions
+        :return: The fitness of each position
+        """
+
+        dx = positions[:, 0] - self.environment.end.x
+        dy = positions[:, 1] - self.environment.end.y
+        fitness = self.GOAL_WEIGHT * np.sqrt(dx ** 2 + dy ** 2)
+
+        # The obstacle term vanishes with a zero weight, so the distances are only queried when needed
+        if self.OBSTACLE_WEIGHT != 0:
+            distances = self.environment.distances_to_closest_obstacle(positions[:, 0], positions[:, 1])
+            fitness += self.OBSTACLE_WEIGHT * (1 / distances)
+
+        return fitness
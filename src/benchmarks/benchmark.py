@@ -0,0 +1,172 @@
+"""
+Benchmarks of the hot paths (micro-benchmarks, see benchmarks/micro.py) and of whole algorithm runs (macro-benchmarks,
+see benchmarks/macro.py), on fixed seeded scenarios.
+
+From the src directory:
+
+    python -m benchmarks.benchmark run --output before.json
+    python -m benchmarks.benchmark run --output after.json
+    python -m benchmarks.benchmark compare before.json after.json --threshold 0.1
+
+compare exits with status 1 if a benchmark got slower by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import macro, micro
+
+
+def measure(setup, repeat: int, min_time: float) -> dict:
+    """
+    Times a benchmark: the function returned by setup is called in loops long enough to be timed reliably (the
+    number of calls per loop is calibrated once), and the loop is repeated.
+
+    :param setup: The function setting up the scenario, and returning the function to time
+    :param repeat: How many loops are timed
+    :param min_time: The minimum duration of a loop, in seconds
+    :return: The best and median time per call, in seconds, and the number of calls per loop
+    """
+
+    run = setup()
+
+    # Calibration (which also warms up the caches)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number)
+
+    return {"best": min(times), "median": statistics.median(times), "number": number, "repeat": repeat}
+
+
+def run_benchmarks(name_filter: str = None, repeat: int = 5, min_time: float = 0.2, verbose: bool = True) -> dict:
+    """
+    Runs the micro- and macro-benchmarks.
+
+    :param name_filter: Only the benchmarks whose name contains it are run, if given
+    :param repeat: How many loops are timed per benchmark
+    :param min_time: The minimum duration of a loop, in seconds
+    :param verbose: Whether we print each result
+    :return: The results, with the description of the machine
+    """
+
+    results = {
+        "metadata": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "benchmarks": {},
+    }
+
+    for kind, benchmarks in (("micro", micro.BENCHMARKS), ("macro", macro.BENCHMARKS)):
+        for name, setup in benchmarks.items():
+            if name_filter is not None and name_filter not in name:
+                continue
+
+            result = measure(setup, repeat, min_time)
+            result["kind"] = kind
+            results["benchmarks"][name] = result
+
+            if verbose:
+                print(f"{name:40} {result['median'] * 1e3:12.4f} ms  (best {result['best'] * 1e3:.4f} ms, "
+                      f"{result['number']} x {result['repeat']})")
+
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1, verbose: bool = True) -> list:
+    """
+    Compares the median times of two benchmark results.
+
+    :param baseline: The reference results
+    :param current: The new results
+    :param threshold: The relative slowdown beyond which a benchmark is a regression (0.1 for 10%)
+    :param verbose: Whether we print the comparison
+    :return: The names of the regressed benchmarks
+    """
+
+    regressions = []
+
+    for name, result in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+
+        ratio = result["median"] / baseline["benchmarks"][name]["median"]
+
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = ""
+
+        if verbose:
+            print(f"{name:40} {baseline['benchmarks'][name]['median'] * 1e3:12.4f} ms -> "
+                  f"{result['median'] * 1e3:12.4f} ms  x{ratio:6.3f}  {status}")
+
+    return regressions
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the hot paths and of the algorithms")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="JSON file to write the results to")
+    run_parser.add_argument("--filter", help="only run the benchmarks whose name contains this")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timed loops per benchmark")
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of a loop, in seconds")
+
+    compare_parser = commands.add_parser("compare", help="compare two results, flagging the regressions")
+    compare_parser.add_argument("baseline", help="JSON file of the reference results")
+    compare_parser.add_argument("current", help="JSON file of the new results")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative slowdown flagged as a regression (default: 0.1)")
+
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "run":
+        results = run_benchmarks(arguments.filter, arguments.repeat, arguments.min_time)
+        if arguments.output is not None:
+            with open(arguments.output, "w") as file:
+                json.dump(results, file, indent=2)
+        return 0
+
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+    with open(arguments.current) as file:
+        current = json.load(file)
+
+    regressions = compare(baseline, current, arguments.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {arguments.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if '__main__' == __name__:
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from algorithms.AdpeAntColonyOptimization import AdpeAntColonyOptimization
+from algorithms.AntColonyOptimization import AntColonyOptimization
+from algorithms.FireflyAlgorithm import FireflyAlgorithm
+from algorithms.ParticleSwarmOptimization import ParticleSwarmOptimization
+from benchmarks.micro import scenario
+from helpers.SerialExecutor import SerialExecutor
+
+# The width (and height) of the environments the algorithms are run on
+MAP_SIZES = (40, 80, 120)
+
+
+def aco(environment):
+    """
+    :return: The Ant Colony Optimization of the benchmark, on the environment
+    """
+
+    return AntColonyOptimization(environment, 16, 5, 400, 0.55, 4000, 30, 1.0, executor=SerialExecutor(), seed=0)
+
+
+def adpe_aco(environment):
+    """
+    :return: The ADPE Ant Colony Optimization of the benchmark, on the environment
+    """
+
+    return AdpeAntColonyOptimization(environment, 16, 5, 400, 0.55, 4000, 30, 1.0, 60, executor=SerialExecutor(),
+                                     seed=0)
+
+
+def pso(environment):
+    """
+    :return: The Particle Swarm Optimization of the benchmark, on the environment
+    """
+
+    return ParticleSwarmOptimization(environment, 100, 4000, 1.0, 1, 0.87, 100, seed=0)
+
+
+def firefly(environment):
+    """
+    :return: The Firefly Algorithm of the benchmark, on the environment
+    """
+
+    return FireflyAlgorithm(environment, 30, 0.87, 0.36, 1.6, 7.8, 0.37, 30, seed=0)
+
+
+# The algorithms, by name, with small budgets (the ants run in the calling process, so the runs use a single core)
+ALGORITHMS = {"aco": aco, "adpe_aco": adpe_aco, "pso": pso, "firefly": firefly}
+
+
+def algorithm_run(algo_id: str, size: int):
+    """
+    :param algo_id: The name of the algorithm
+    :param size: The width and height of the environment
+    :return: A function running the algorithm once, on a seeded scenario
+    """
+
+    def setup():
+        environment, specification = scenario(size)
+
+        def run():
+            # A new algorithm for every call, so every call is the same first run of seed 0 (reusing the algorithm
+            # would run on the next random streams, and on the state left by the previous run)
+            ALGORITHMS[algo_id](environment).run(specification, print_progress=False)
+
+        return run
+
+    setup.__doc__ = f"{algo_id}.run on a {size}x{size} environment."
+
+    return setup
+
+
+# The macro-benchmarks, by name: each function sets up its scenario and returns the function to time
+BENCHMARKS = {f"{algo_id}_run_{size}": algorithm_run(algo_id, size) for algo_id in ALGORITHMS for size in MAP_SIZES}
@@ -0,0 +1,227 @@
+import numpy as np
+
+from agents.Ant import Ant
+from agents.Firefly import Firefly
+from agents.FireflySwarm import FireflySwarm
+from agents.Particle import Particle
+from agents.ParticleSwarm import ParticleSwarm
+from environments.ACOEnvironment import ACOEnvironment
+from environments.Environment import Environment
+from helpers.Coordinate import Coordinate
+from helpers.LevySampler import LevySampler
+from helpers.Path import Path
+from helpers.PathSpecification import PathSpecification
+
+# The obstacle values of the scenarios, as a list of (radius, frequency)
+OBSTACLE_VALUES = [(2.5, 0.15), (1.5, 0.05)]
+
+
+def scenario(size: int, seed: int = 0) -> (Environment, PathSpecification):
+    """
+    Returns a seeded scenario: a square environment with obstacles, and a path from a corner to the opposite one.
+
+    :param size: The width and height of the environment
+    :param seed: The seed of the environment
+
+    :return: The environment and the path specification
+    """
+
+    start = Coordinate(2, 2)
+    end = Coordinate(size - 2, size - 2)
+    environment = Environment.create_environment(size, size, OBSTACLE_VALUES, start, end, seed=seed)
+
+    return environment, PathSpecification(start, end)
+
+
+def distance_scalar():
+    """
+    distance_to_closest_obstacle, called on 1000 float positions one at a time.
+    """
+
+    environment, _ = scenario(40)
+    environment.distance_field
+    rng = np.random.default_rng(0)
+    positions = [Coordinate(x, y) for x, y in rng.uniform(0, 39, size=(1000, 2)).tolist()]
+
+    def run():
+        for position in positions:
+            environment.distance_to_closest_obstacle(position)
+
+    return run
+
+
+def distance_batched():
+    """
+    distances_to_closest_obstacle, on 20000 float positions at once.
+    """
+
+    environment, _ = scenario(160)
+    environment.distance_field
+    rng = np.random.default_rng(0)
+    xs, ys = rng.uniform(0, 159, size=(2, 20000))
+
+    def run():
+        environment.distances_to_closest_obstacle(xs, ys)
+
+    return run
+
+
+def ant_find_path():
+    """
+    Ant.find_path, for a single ant on fresh pheromones (the same walk on every call).
+    """
+
+    environment, specification = scenario(40)
+    environment = ACOEnvironment.create_from_environment(environment)
+    environment.neighbour_offsets(1)
+
+    def run():
+        Ant(environment, specification, 4000, 1.0, 1, np.random.default_rng(0)).find_path()
+
+    return run
+
+
+def evaporate():
+    """
+    ACOEnvironment.reset, and 10 generations of ACOEnvironment.evaporate, on a 160x160 environment.
+    """
+
+    environment, _ = scenario(160)
+    environment = ACOEnvironment.create_from_environment(environment)
+
+    def run():
+        # Every call starts from fresh pheromones, like a run, so the changes kept since the reset stay bounded
+        environment.reset()
+        for _ in range(10):
+            environment.evaporate(0.1)
+
+    return run
+
+
+def path_size():
+    """
+    Path.add and Path.size, building a path of 1000 positions and measuring it after each one.
+    """
+
+    rng = np.random.default_rng(0)
+    positions = [Coordinate(x, y) for x, y in rng.uniform(0, 40, size=(1000, 2)).tolist()]
+
+    def run():
+        path = Path(positions[0])
+        for position in positions:
+            path.add(position)
+            path.size()
+
+    return run
+
+
+def pso_iteration():
+    """
+    One iteration of 100 Particle objects (update_particle), from the same positions and velocities on every call.
+    """
+
+    environment, specification = scenario(40)
+    environment.distance_field
+    rng = np.random.default_rng(0)
+    particles = [Particle(environment, specification, 4000, 1.0, *rng.uniform(-1, 1, size=2).tolist(), rng=rng)
+                 for _ in range(100)]
+    velocities = [(particle.velocity_x, particle.velocity_y) for particle in particles]
+    global_best = specification.start
+
+    def run():
+        rng = np.random.default_rng(0)
+        for particle, (velocity_x, velocity_y) in zip(particles, velocities):
+            particle.current_position = specification.start
+            particle.velocity_x = velocity_x
+            particle.velocity_y = velocity_y
+            particle.rand = rng
+
+        for particle in particles:
+            particle.update_particle(global_best, particle.personal_best_pos, 1.5, 1.5, 1, 100)
+
+    return run
+
+
+def pso_swarm_iteration():
+    """
+    One iteration of a ParticleSwarm of 100 particles (update and update_bests), from the same state on every call.
+    """
+
+    environment, specification = scenario(40)
+    end = np.array([specification.end.x, specification.end.y], dtype=np.float64)
+    swarm = ParticleSwarm(environment, specification, 100, lambda positions: np.hypot(*(positions - end).T),
+                          rng=np.random.default_rng(0))
+    state = swarm.positions.copy(), swarm.velocities.copy(), swarm.personal_best.copy(), \
+        swarm.personal_best_fitness.copy()
+    global_best = np.array([specification.start.x, specification.start.y], dtype=np.float64)
+
+    def run():
+        for array, initial in zip((swarm.positions, swarm.velocities, swarm.personal_best,
+                                   swarm.personal_best_fitness), state):
+            array[...] = initial
+        swarm.rand = np.random.default_rng(0)
+
+        swarm.update(global_best, 1.5, 1.5, 1, 100)
+        swarm.update_bests()
+
+    return run
+
+
+def firefly_moves():
+    """
+    100 moves of a Firefly towards another one (move_towards), by a new firefly on every call.
+    """
+
+    environment, specification = scenario(40)
+    environment.distance_field
+    target = Coordinate(10, 10)
+
+    def run():
+        firefly = Firefly(environment, specification, 0.87, 0.36, 0.37, 1.6, 7.8, rng=np.random.default_rng(0))
+        for _ in range(100):
+            firefly.move_towards(target, 0.5)
+            firefly.position = specification.start
+
+    return run
+
+
+def firefly_swarm_move():
+    """
+    One generation of a FireflySwarm of 100 fireflies (move), from the same state on every call.
+    """
+
+    environment, specification = scenario(40)
+    swarm = FireflySwarm(environment, specification, 100, 0.87, 0.36, 0.37, 1.6, 7.8,
+                         rng=np.random.default_rng(0))
+    # The fireflies are spread out first, so they are attracted by one another
+    swarm.positions[:] = np.random.default_rng(1).uniform(2, 38, size=(100, 2))
+    swarm.update_intensities()
+    positions = swarm.positions.copy()
+
+    def run():
+        swarm.positions[:] = positions
+        swarm.path_ends[:] = positions
+        for path in swarm.paths:
+            path.truncate(1)
+        rng = np.random.default_rng(0)
+        swarm.rand = rng
+        swarm.levy = LevySampler(rng)
+
+        swarm.update_intensities()
+        swarm.move(0.5)
+
+    return run
+
+
+# The micro-benchmarks, by name: each function sets up its scenario and returns the function to time
+BENCHMARKS = {
+    "distance_to_closest_obstacle": distance_scalar,
+    "distances_to_closest_obstacle": distance_batched,
+    "ant_find_path": ant_find_path,
+    "aco_reset_evaporate": evaporate,
+    "path_size": path_size,
+    "pso_iteration": pso_iteration,
+    "pso_swarm_iteration": pso_swarm_iteration,
+    "firefly_moves": firefly_moves,
+    "firefly_swarm_move": firefly_swarm_move,
+}
@@ -1,6 +1,14 @@
+import copy
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
 from environments.Environment import Environment
 
 from helpers.Coordinate import Coordinate
+from helpers.Direction import DIRECTION_DELTAS
+from helpers.DistanceField import DistanceField
 from helpers.Path import Path
 from helpers.SurroundingPheromone import SurroundingPheromone
 
@@ -9,28 +17,211 @@ class ACOEnvironment(Environment):
     """
     Class that holds all the environment data. This means the pheromones, the open and blocked tiles in the system as
     well as the starting and end coordinates.
+
+    With lazy evaporation, evaporating only updates a global scale factor: the pheromone of a cell is its stored value
+    times the scale, which is applied when the cell is read or deposited to. The stored values are renormalised once
+    the scale becomes too small, to avoid underflow.
+
+    Pheromones live inside a zero padded array, with a margin as wide as the largest step size used so far, so the
+    eight neighbours of any cell are read with a single gather at precomputed flat offsets.
+
+    Since the last reset, the environment keeps the factors of the multiplications of the whole array and which
+    cells received pheromone. That is enough for a copy of the environment (e.g. in another process) to catch up
+    exactly with pheromone_update / apply_pheromone_update, without sending the whole array.
+
+    The arrays read by the ants (pheromones, evaporation scale, open cells and distance field) can also be moved to a
+    shared memory block with share_memory. Copies of the environment made by pickling it then attach to the same
+    block, as read-only views, and see every change made to the original one without any copying.
     """
 
-    def __init__(self, width: int, height: int, obstacles=None, start=None, end=None):
-        super().__init__(width, height, obstacles, start, end)
+    # Scale factor below which the lazily evaporated pheromones are renormalised
+    RENORMALIZE_BELOW = 1e-100
+
+    def __init__(self, width: int, height: int, obstacles=None, start=None, end=None,
+                 lazy_evaporation: bool = False, distance_field: DistanceField = None):
+        super().__init__(width, height, obstacles, start, end, distance_field)
 
         # Specific to ACO, we use pheromones to guide the ants.
+        # The pheromone of a cell is pheromones[x, y] * pheromone_scale
+        self.lazy_evaporation: bool = lazy_evaporation
         self.pheromones = None
+        self._scale = np.ones(1, dtype=np.float64)
+
+        # Padded pheromones (pheromones is a view of its interior) and mask of the open cells, with the same padding
+        self.padding: int = 1
+        self._padded = None
+        self._open = None
+        self._neighbour_offsets = {}
+
+        # Shared memory block holding the arrays, if shared, and whether this environment created it
+        self._shared_memory = None
+        self._owns_shared_memory = False
+        self._release_finalizer = None
+
+        # Changes since the last reset: number of resets so far, factors of the whole array multiplications and
+        # mask of the cells that received pheromone
+        self.resets: int = 0
+        self._factors = []
+        self._touched = None
+
         self.initialize_pheromones()
 
     def initialize_pheromones(self):
         """
-        Initialize pheromones to a start value.
+        Initialize pheromones to a start value, and to zero on the cells colliding with an obstacle.
+        """
+
+        occupancy = self.distance_field.occupancy()
+
+        # The arrays are updated in place, as they may be shared
+        if self._padded is None:
+            self._allocate(self.padding)
+        self._open[self.padding:self.padding + self.width, self.padding:self.padding + self.height] = ~occupancy
+
+        self.pheromones[...] = 1 / (self.width * self.height)
+        self.pheromones[occupancy] = 0
+        self.pheromone_scale = 1.0
+
+        self._factors = []
+        self._touched = np.zeros((self.width, self.height), dtype=bool)
+
+    def _allocate(self, padding: int):
+        """
+        (Re)allocates the padded arrays with the given padding, keeping the current pheromones.
+
+        :param padding: The width of the margin around the environment
+        """
+
+        # New arrays are moved to a new shared memory block
+        shared = self._shared_memory is not None
+        if shared:
+            self.release_memory()
+
+        interior = (slice(padding, padding + self.width), slice(padding, padding + self.height))
+        padded = np.zeros((self.width + 2 * padding, self.height + 2 * padding), dtype=np.float64)
+        if self.pheromones is not None:
+            padded[interior] = self.pheromones
+
+        self._open = np.zeros(padded.shape, dtype=np.float64)
+        self._open[interior] = ~self.distance_field.occupancy()
+
+        self.padding = padding
+        self._padded = padded
+        self.pheromones = padded[interior]
+        self._neighbour_offsets = {}
+
+        if shared:
+            self.share_memory()
+
+    @property
+    def pheromone_scale(self) -> float:
+        return self._scale.item(0)
+
+    @pheromone_scale.setter
+    def pheromone_scale(self, scale: float):
+        self._scale[0] = scale
+
+    @property
+    def shared(self) -> bool:
+        """
+        :return: Whether the arrays of the environment are in shared memory
+        """
+
+        return self._shared_memory is not None
+
+    def share_memory(self):
+        """
+        Moves the pheromones, the evaporation scale, the open cells and the distance field to a new shared memory
+        block, if not shared yet. The block is freed by release_memory, or once this environment is garbage
+        collected.
         """
 
-        self.pheromones = [[1 / (self.width * self.height) for _ in range(self.height)] for _ in range(self.width)]
+        if self._shared_memory is not None:
+            return
 
-        for i in range(self.width):
-            for j in range(self.height):
-                if self.distance_to_closest_obstacle(Coordinate(i, j)) < 0:
-                    self.pheromones[i][j] = 0
+        field = self.distance_field.field
+        block = SharedMemory(create=True, size=8 * (2 * self._padded.size + 1 + field.size))
+        padded, open_cells, scale, shared_field = self._shared_views(block, self._padded.shape)
+
+        padded[...] = self._padded
+        open_cells[...] = self._open
+        scale[...] = self._scale
+        shared_field[...] = field
+
+        self._attach(block, padded, open_cells, scale, shared_field)
+        self._owns_shared_memory = True
+        self._release_finalizer = weakref.finalize(self, ACOEnvironment._unlink, block)
+
+    def release_memory(self):
+        """
+        Moves the arrays back to the private memory of the process, and frees the shared memory block if this
+        environment created it. Copies attached to the block no longer see the changes made afterwards.
+        """
+
+        if self._shared_memory is None:
+            return
+
+        self._padded = self._padded.copy()
+        self._open = self._open.copy()
+        self._scale = self._scale.copy()
+        self.distance_field.field = self.distance_field.field.copy()
+        self.pheromones = self._padded[self.padding:self.padding + self.width,
+                                       self.padding:self.padding + self.height]
+
+        if self._owns_shared_memory:
+            self._release_finalizer()
+
+        # Views of the block still held elsewhere keep it mapped until they are gone
+        try:
+            self._shared_memory.close()
+        except BufferError:
+            pass
+        self._shared_memory = None
+        self._owns_shared_memory = False
+        self._release_finalizer = None
+
+    def _shared_views(self, block: SharedMemory, shape: tuple) -> tuple:
+        """
+        :return: The padded pheromones, open cells, scale and distance field arrays, laid out in a shared memory block
+        """
+
+        size = shape[0] * shape[1]
+        buffer = np.ndarray(2 * size + 1 + self.width * self.height, dtype=np.float64, buffer=block.buf)
+
+        return (buffer[:size].reshape(shape), buffer[size:2 * size].reshape(shape), buffer[2 * size:2 * size + 1],
+                buffer[2 * size + 1:].reshape(self.width, self.height))
+
+    def _attach(self, block: SharedMemory, padded, open_cells, scale, field):
+        """
+        Makes the environment use the arrays of a shared memory block.
+        """
+
+        self._shared_memory = block
+        self._padded = padded
+        self._open = open_cells
+        self._scale = scale
+        self.distance_field.field = field
+        self.pheromones = padded[self.padding:self.padding + self.width, self.padding:self.padding + self.height]
+
+    @staticmethod
+    def _unlink(block: SharedMemory):
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+    def get_pheromones(self):
+        """
+        :return: The (width, height) array of pheromones, with the evaporation scale applied
+        """
+
+        if self.pheromone_scale == 1.0:
+            return self.pheromones
+
+        return self.pheromones * self.pheromone_scale
 
     def reset(self):
+        self.resets += 1
         self.initialize_pheromones()
 
     def add_pheromone_path(self, path: Path, q: int):
@@ -41,25 +232,42 @@ class ACOEnvironment(Environment):
         :param q: Normalization factor for the amount of dropped pheromone
         :return:
         """
-        amount = 0
 
-        if path.size() != 0:
-            amount = q / path.size()
-
-        for coordinate in path.get_path():
-            self.pheromones[coordinate.x][coordinate.y] += amount
+        self.add_pheromone_paths([path], q)
 
     def add_pheromone_paths(self, paths, q: int):
         """
-        Update pheromones for a list of paths
+        Update pheromones for a list of paths, with a single scatter-add over all their cells.
 
         :param paths: A list of paths
         :param q: Normalization factor for amount of dropped pheromone
         :return:
         """
 
+        if len(paths) == 0:
+            return
+
+        xs = []
+        ys = []
+        amounts = []
+
         for path in paths:
-            self.add_pheromone_path(path, q)
+            amount = 0
+
+            if path.size() != 0:
+                amount = q / path.size()
+
+            points = path.as_array()
+            xs.append(points[:, 0])
+            ys.append(points[:, 1])
+            amounts.append(np.full(len(points), amount, dtype=np.float64))
+
+        xs = np.concatenate(xs).astype(np.intp)
+        ys = np.concatenate(ys).astype(np.intp)
+
+        # Unbuffered, so cells visited more than once receive every deposit, in order
+        np.add.at(self.pheromones, (xs, ys), np.concatenate(amounts) / self.pheromone_scale)
+        self._touched[xs, ys] = True
 
     def evaporate(self, rho: float):
         """
@@ -68,9 +276,136 @@ class ACOEnvironment(Environment):
         :param rho: evaporation factor
         """
 
-        for i in range(self.width):
-            for j in range(self.height):
-                self.pheromones[i][j] *= (1 - rho)
+        # The padding is zero, so we can multiply the whole (contiguous) padded array
+        if not self.lazy_evaporation:
+            self._multiply(1 - rho)
+            return
+
+        self.pheromone_scale *= (1 - rho)
+
+        if self.pheromone_scale < self.RENORMALIZE_BELOW:
+            self._multiply(self.pheromone_scale)
+            self.pheromone_scale = 1.0
+
+    def _multiply(self, factor: float):
+        """
+        Multiplies all the stored pheromones by a factor.
+
+        :param factor: The factor
+        """
+
+        self._padded *= factor
+        self._factors.append(factor)
+
+    def pheromone_update(self) -> tuple:
+        """
+        The changes to the pheromones since the last reset, to bring a copy of this environment up to date (see
+        apply_pheromone_update). Its size grows with the cells visited by the ants, not with the environment.
+
+        :return: The number of resets, the factors of the whole array multiplications, the flat (x * height + y)
+                 indices of the cells that received pheromone, their stored values and the evaporation scale
+        """
+
+        cells = np.flatnonzero(self._touched)
+
+        return self.resets, tuple(self._factors), cells, self.pheromones[self._touched], self.pheromone_scale
+
+    def apply_pheromone_update(self, update: tuple):
+        """
+        Brings the pheromones up to date with the environment that made the update, as long as this environment
+        started as a copy of it. The resulting pheromones are exactly the same.
+
+        :param update: The result of pheromone_update on the other environment
+        """
+
+        resets, factors, cells, values, scale = update
+
+        if resets != self.resets:
+            self.resets = resets
+            self.initialize_pheromones()
+
+        # Cells that never received pheromone only went through the multiplications, in the same order
+        for factor in factors[len(self._factors):]:
+            self._multiply(factor)
+
+        xs, ys = np.divmod(cells, self.height)
+        self.pheromones[xs, ys] = values
+        self._touched[xs, ys] = True
+        self.pheromone_scale = scale
+
+    def get_neighbour_pheromones(self, position: Coordinate, step_size: int = 1) -> np.ndarray:
+        """
+        Returns the pheromones of the eight neighbouring positions, in the order of Direction. Neighbours out of
+        bounds or colliding with an obstacle have no pheromone.
+
+        :param position: The (integer) position to check the neighbours of.
+        :param step_size: How many cells do we move in each direction.
+        :return: Array with the 8 pheromone levels
+        """
+
+        offsets = self.neighbour_offsets(step_size)
+
+        return self.get_cell_pheromones(offsets + self.cell_index(position))
+
+    def neighbour_offsets(self, step_size: int = 1) -> np.ndarray:
+        """
+        Flat offsets from a cell to its eight neighbours in the padded layout, in the order of Direction.
+        Grows the padding if needed, which invalidates the cell indices computed before.
+
+        :param step_size: How many cells do we move in each direction.
+        :return: Array with the 8 offsets
+        """
+
+        if step_size > self.padding:
+            self._allocate(step_size)
+
+        offsets = self._neighbour_offsets.get(step_size)
+        if offsets is None:
+            stride = self._padded.shape[1]
+            offsets = np.array([dx * step_size * stride + dy * step_size for dx, dy in DIRECTION_DELTAS])
+            self._neighbour_offsets[step_size] = offsets
+
+        return offsets
+
+    def cell_index(self, position: Coordinate) -> int:
+        """
+        :param position: An (integer) position of the environment
+        :return: The flat index of the position in the padded layout
+        """
+
+        return (position.x + self.padding) * self._padded.shape[1] + position.y + self.padding
+
+    def cell_count(self) -> int:
+        """
+        :return: The number of cells of the padded layout
+        """
+
+        return self._padded.size
+
+    def cell_coordinate(self, cell: int) -> Coordinate:
+        """
+        :param cell: A flat index in the padded layout
+        :return: The position of the cell
+        """
+
+        x, y = divmod(int(cell), self._padded.shape[1])
+
+        return Coordinate(x - self.padding, y - self.padding)
+
+    def get_cell_pheromones(self, cells) -> np.ndarray:
+        """
+        Pheromones of many cells at once. Padding and obstacle cells have no pheromone.
+
+        :param cells: Flat indices in the padded layout (array-like, of any shape)
+        :return: The pheromones of the cells, with the shape of cells
+        """
+
+        pheromones = self._padded.ravel().take(cells) * self._open.ravel().take(cells)
+
+        if self.pheromone_scale != 1.0:
+            pheromones *= self.pheromone_scale
+
+        return pheromones
 
     def get_surrounding_pheromone(self, position: Coordinate, step_size: int = 1):
         """
@@ -81,16 +416,7 @@ class ACOEnvironment(Environment):
         :return: The pheromones of the neighbouring positions.
         """
 
-        up = self.get_pheromone(Coordinate(position.x, position.y + step_size))
-        up_right = self.get_pheromone(Coordinate(position.x + step_size, position.y + step_size))
-        right = self.get_pheromone(Coordinate(position.x + step_size, position.y))
-        down_right = self.get_pheromone(Coordinate(position.x + step_size, position.y - step_size))
-        down = self.get_pheromone(Coordinate(position.x, position.y - step_size))
-        down_left = self.get_pheromone(Coordinate(position.x - step_size, position.y - step_size))
-        left = self.get_pheromone(Coordinate(position.x - step_size, position.y))
-        up_left = self.get_pheromone(Coordinate(position.x - step_size, position.y + step_size))
-
-        return SurroundingPheromone(up, up_right, right, down_right, down, down_left, left, up_left)
+        return SurroundingPheromone(*self.get_neighbour_pheromones(position, step_size).tolist())
 
     def get_pheromone(self, pos: Coordinate):
         """
@@ -102,11 +428,52 @@ class ACOEnvironment(Environment):
 
         if self.distance_to_closest_obstacle(pos) < 0:
             return 0
-        return self.pheromones[pos.x][pos.y]
+        return self.pheromones.item(pos.x, pos.y) * self.pheromone_scale
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The pheromones are a view of the padded array, which pickle would otherwise copy separately
+        state["pheromones"] = None
+        state["_release_finalizer"] = None
+
+        # Shared arrays are replaced by the name of their block
+        if self._shared_memory is not None:
+            state["_shared_memory"] = self._shared_memory.name
+            state["_owns_shared_memory"] = False
+            state["_padded"] = self._padded.shape
+            state["_open"] = None
+            state["_scale"] = None
+            state["_distance_field"] = copy.copy(self._distance_field)
+            state["_distance_field"].field = None
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        if self._shared_memory is None:
+            self.pheromones = self._padded[self.padding:self.padding + self.width,
+                                           self.padding:self.padding + self.height]
+            return
+
+        # Attach to the shared block, which stays owned (and freed) by the original environment
+        # (before Python 3.13 attaching registers the block again, which is harmless for child processes, as they
+        # share the resource tracker of their parent)
+        try:
+            block = SharedMemory(name=self._shared_memory, track=False)
+        except TypeError:
+            block = SharedMemory(name=self._shared_memory)
+
+        views = self._shared_views(block, self._padded)
+        for view in views:
+            view.flags.writeable = False
+
+        self._attach(block, *views)
 
     @staticmethod
     def create_new_environment(width: int, height: int, obstacles=None,
-                               start_pos: Coordinate = None, end_pos: Coordinate = None):
+                               start_pos: Coordinate = None, end_pos: Coordinate = None,
+                               lazy_evaporation: bool = False):
         """
         :return: a new ACO environment with the given parameters.
         """
@@ -114,12 +481,16 @@ class ACOEnvironment(Environment):
                                                                   start_pos, end_pos)
 
         return ACOEnvironment(environment.width, environment.height, environment.obstacles,
-                              environment.start, environment.end)
+                              environment.start, environment.end, lazy_evaporation)
 
     @staticmethod
-    def create_from_environment(environment: Environment):
+    def create_from_environment(environment: Environment, lazy_evaporation: bool = False):
         """
-        :return: a new ACO environment from the given environment.
+        :return: a new ACO environment from the given environment, reusing its distance field.
         """
+
+        # A copy of the field object over the same array, as sharing the memory of the new environment moves its
+        # field array, which must not affect the given environment
         return ACOEnvironment(environment.width, environment.height, environment.obstacles,
-                              environment.start, environment.end)
+                              environment.start, environment.end, lazy_evaporation,
+                              copy.copy(environment.distance_field))
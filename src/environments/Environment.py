@@ -2,9 +2,13 @@ import math
 import random
 
 import matplotlib.pyplot as plt
+import numpy as np
 
 from helpers.Coordinate import Coordinate
+from helpers.DistanceField import DistanceField
+from helpers.Fingerprint import fingerprint
 from helpers.Obstacle import Obstacle
+from helpers.ObstacleIndex import ObstacleIndex
 from helpers.Path import Path
 
 
@@ -16,7 +20,8 @@ class Environment:
     the environment class for each algorithm, as some use pheromones, etc.
     """
 
-    def __init__(self, width: int, height: int, obstacles=None, start=None, end=None):
+    def __init__(self, width: int, height: int, obstacles=None, start=None, end=None,
+                 distance_field: DistanceField = None):
         """
         Constructor for the environment class.
 
@@ -27,16 +32,21 @@ class Environment:
         Default: (0, 0)
         :param end: Of the agents (we assume all agents aim to arrive to the same position).
         Default: (width - 1, height - 1)
+        :param distance_field: The distance field of the same obstacles, if already built (e.g. by another
+        environment), or None to build it when needed
         """
 
         self.width: int = width
         self.height: int = height
 
+        # Distance field over the cells of the environment and spatial index over the obstacles,
+        # both built lazily from the obstacles
+        self._distance_field = None
+        self._obstacle_index = None
+
         # Set obstacles of the environment
-        if obstacles is None:
-            self.obstacles = []
-        else:
-            self.obstacles = obstacles
+        self.obstacles = obstacles
+        self._distance_field = distance_field
 
         # We set the initial and final position of our environment (by default, the opposite corners)
         if start is None:
@@ -49,6 +59,69 @@ class Environment:
         else:
             self.end: Coordinate = end
 
+    @property
+    def obstacles(self):
+        """
+        Obstacles getter. Obstacles should be changed through the setter or add_obstacle, so that the
+        distance field and the obstacle index are rebuilt.
+
+        :return: The obstacles of the environment
+        """
+
+        return self._obstacles
+
+    @obstacles.setter
+    def obstacles(self, obstacles):
+        """
+        Obstacles setter, invalidates the distance field and the obstacle index.
+
+        :param obstacles: The new obstacles of the environment (each of type Obstacle)
+        """
+
+        self._obstacles = [] if obstacles is None else obstacles
+        self._distance_field = None
+        self._obstacle_index = None
+
+    def add_obstacle(self, obstacle: Obstacle):
+        """
+        Adds an obstacle to the environment, invalidating the distance field.
+
+        :param obstacle: The obstacle to be added
+        """
+
+        self._obstacles.append(obstacle)
+        self._distance_field = None
+
+        if self._obstacle_index is not None:
+            self._obstacle_index.insert(obstacle)
+
+    @property
+    def distance_field(self) -> DistanceField:
+        """
+        The distance field of the environment, built once and reused until the obstacles change.
+
+        :return: The distance field
+        """
+
+        if self._distance_field is None:
+            self._distance_field = DistanceField(self.width, self.height, self.obstacle_index,
+                                                 distance(self.start, self.end))
+
+        return self._distance_field
+
+    @property
+    def obstacle_index(self) -> ObstacleIndex:
+        """
+        The spatial index over the obstacles of the environment, built once and reused until the obstacles change.
+
+        :return: The obstacle index
+        """
+
+        if self._obstacle_index is None:
+            self._obstacle_index = ObstacleIndex(self._obstacles)
+
+        return self._obstacle_index
+
     def get_width(self):
         """
         Width getter
@@ -79,24 +152,99 @@ class Environment:
         Returns the smallest distance to an obstacle, or -1 if it is the position is not valid (out of bounds or
         colliding with an obstacle.)
 
+        Integer positions are looked up in the precomputed distance field, while float positions are answered
+        exactly by the obstacle index.
+
         :param position: The position to be checked
-        :return: Whether the position is in the current environment
+        :return: The distance to the closest obstacle, or -1 if the position is not valid
         """
 
         # Check whether the given position is within the bounds of the environment
         if not position.x_between(0, self.width) or not position.y_between(0, self.height):
             return -1.0
 
-        # We initially set the minimum distance to the maximum possible distance
-        minimum_distance = distance(self.start, self.end)
+        # Both the field and the index already mark the positions colliding with an obstacle
+        if float(position.x).is_integer() and float(position.y).is_integer():
+            return self.distance_field.value(position.x, position.y)
 
-        # Check whether the given position is not colliding with an obstacle
-        for obstacle in self.obstacles:
-            minimum_distance = distance(obstacle.center, position)
-            if minimum_distance <= obstacle.radius:
-                return -1.0
+        return self.obstacle_index.distance(position.x, position.y, distance(self.start, self.end))
+
+    def in_bounds_mask(self, xs, ys) -> np.ndarray:
+        """
+        Batched bounds check.
+
+        :param xs: The x positions (array-like)
+        :param ys: The y positions (array-like, same shape as xs)
+        :return: Boolean mask, True where the position lies within the environment
+        """
+
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+
+        return (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+
+    def distances_to_closest_obstacle(self, xs, ys) -> np.ndarray:
+        """
+        Batched version of distance_to_closest_obstacle, for a whole swarm or neighbourhood at once.
 
-        return minimum_distance
+        :param xs: The x positions (array-like)
+        :param ys: The y positions (array-like, same shape as xs)
+        :return: The distance of each position to the closest obstacle, or -1 where it is not valid
+        """
+
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        distances = np.full(xs.shape, -1.0)
+
+        valid = self.in_bounds_mask(xs, ys)
+        on_cells = valid & (xs == np.floor(xs)) & (ys == np.floor(ys))
+        off_cells = valid & ~on_cells
+
+        # Cells are read from the distance field, other positions are answered exactly by the obstacle index
+        distances[on_cells] = self.distance_field.field[xs[on_cells].astype(np.int64), ys[on_cells].astype(np.int64)]
+        distances[off_cells] = self.obstacle_index.distances(xs[off_cells], ys[off_cells],
+                                                             distance(self.start, self.end))
+
+        return distances
+
+    def collision_mask(self, xs, ys, obstacle_distance: float = 0) -> np.ndarray:
+        """
+        Batched check of whether positions are out of bounds, colliding with an obstacle, or too close to one.
+
+        :param xs: The x positions (array-like)
+        :param ys: The y positions (array-like, same shape as xs)
+        :param obstacle_distance: The required minimum distance to an obstacle
+        :return: Boolean mask, True where the position is not allowed
+        """
+
+        distances = self.distances_to_closest_obstacle(xs, ys)
+
+        return (distances < 0) | (distances < obstacle_distance)
+
+    def agent_out_of_bounds_mask(self, xs, ys, obstacle_distance: float = 0) -> np.ndarray:
+        """
+        Batched version of Agent.position_out_of_bounds, where positions beyond the last row or column (even by less
+        than a cell) are out of bounds.
+
+        :param xs: The x positions (array-like)
+        :param ys: The y positions (array-like, same shape as xs)
+        :param obstacle_distance: The required minimum distance to an obstacle
+        :return: Boolean mask, True where an agent is not allowed to move
+        """
+
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        outside = (xs > self.width - 1) | (ys > self.height - 1)
+
+        return outside | self.collision_mask(xs, ys, obstacle_distance)
+
+    def fingerprint(self) -> str:
+        """
+        :return: A stable fingerprint of the size, start, end and obstacles of the environment (not of the state of
+        the algorithms, such as pheromones)
+        """
+
+        return fingerprint(self.width, self.height, self.start, self.end, self.obstacles)
 
     def __str__(self):
         """
@@ -135,8 +283,8 @@ class Environment:
 
         # If a path is provided, draw the path on the grid
         if path is not None:
-            x_values = [point.x for point in path.get_path()]
-            y_values = [point.y for point in path.get_path()]
+            x_values = path.as_array()[:, 0]
+            y_values = path.as_array()[:, 1]
             ax.plot(x_values, y_values, 'b-', linewidth=2)  # Route in blue, with a bigger width to make it more visible
 
         # Adjust axes limits
@@ -182,34 +330,78 @@ class Environment:
             raise ValueError("The given start_pos and end_pos are not valid: make sure that both start_pos and end_pos"
                              " are within the bounds of the environment and that they are not the same")
 
-        random.seed(seed)
+        # A generator of our own, so the global random state is left untouched
+        rng = random.Random(seed)
 
         # We now set the legal area for the obstacles
         left, right, top, bottom = compute_inner_space(width, height)
 
         obstacles = []
 
+        # Obstacles placed so far, hashed by position, so each candidate is only compared with its neighbours
+        index = ObstacleIndex(cell_size=max([1.0] + [2 * obstacle[0] for obstacle in obstacle_values]))
+
         for obstacle in obstacle_values:
             amount_of_obstacles = get_amount_of_obstacles(height, width, obstacle[1], obstacle[0])
 
             current_amount = 0
+            rejections = 0
 
             # Generate obstacles
             while current_amount < amount_of_obstacles:
-                obstacle_pos = Coordinate(random.randint(left, right), random.randint(bottom, top))
-
-                if all(distance(obstacle_pos, obstacle2.center) >=
-                       (obstacle[0] + obstacle2.radius) for obstacle2 in obstacles):
-                    obstacles.append(Obstacle(obstacle_pos, obstacle[0]))
+                # Close to the maximum density almost every candidate is rejected,
+                # so we switch to drawing from the positions that are still free
+                if rejections >= MAX_REJECTIONS:
+                    place_on_free_cells(index, obstacles, obstacle[0], amount_of_obstacles - current_amount,
+                                        (left, right, top, bottom), rng)
+                    break
+
+                obstacle_pos = Coordinate(rng.randint(left, right), rng.randint(bottom, top))
+
+                if not index.overlaps(obstacle_pos.x, obstacle_pos.y, obstacle[0]):
+                    new_obstacle = Obstacle(obstacle_pos, obstacle[0])
+                    obstacles.append(new_obstacle)
+                    index.insert(new_obstacle)
                     current_amount += 1
+                    rejections = 0
+                else:
+                    rejections += 1
+
+        environment = Environment(width, height, obstacles, start_pos, end_pos)
+        environment._obstacle_index = index
+
+        return environment
+
+    @staticmethod
+    def create_environments(width: int, height: int, obstacle_values, start_pos: Coordinate = None,
+                            end_pos: Coordinate = None, seeds=(None,)):
+        """
+        Method that creates many environments with the same parameters, one per seed.
+        Useful for evaluation sweeps, where every environment must be reproducible.
+
+        :param width: Of the environments
+        :param height: Of the environments
+        :param obstacle_values: A list of obstacle types we want, as a pair of ints (x, y)
+        where x is the radius and y is the frequency (in %)
+        :param start_pos: Of the agents. Default: (0, 0)
+        :param end_pos: Of the agents. Default: (width - 1, height - 1)
+        :param seeds: The seeds for the random number generator, one per environment
+
+        :return: A list of environment objects, in the order of the seeds
+        """
 
-        return Environment(width, height, obstacles, start_pos, end_pos)
+        return [Environment.create_environment(width, height, obstacle_values, start_pos, end_pos, seed)
+                for seed in seeds]
 
 
 ############################################################################################################
 # Helper functions
 
 
+# Consecutive rejected obstacle candidates after which we enumerate the free positions instead
+MAX_REJECTIONS = 1000
+
+
 def compute_inner_space(width, height):
     """
     Obstacles can only be generated in the central 80% of the grid.
@@ -256,6 +448,59 @@ def get_amount_of_obstacles(height, width, obstacle_percentage, obstacle_radius)
     return amount_of_obstacles
 
 
+def place_on_free_cells(index: ObstacleIndex, obstacles, obstacle_radius, amount, bounds, rng):
+    """
+    Place obstacles by visiting the positions of the inner space in random order and keeping the ones that are still
+    free. This draws every obstacle uniformly among the free positions, like the rejection sampling, but its cost does
+    not explode close to the maximum density.
+
+    :param index: The index of the obstacles placed so far (updated in place)
+    :param obstacles: The list of obstacles placed so far (updated in place)
+    :param obstacle_radius: The radius of the obstacles to place
+    :param amount: How many obstacles to place
+    :param bounds: The boundaries of the inner space, as returned by compute_inner_space
+    :param rng: The random number generator
+    :raises: ValueError if there is not enough free space left for all the obstacles
+    """
+
+    left, right, top, bottom = bounds
+    xs = np.arange(left, right + 1)
+    ys = np.arange(bottom, top + 1)
+    free = np.ones((xs.size, ys.size), dtype=bool)
+
+    def block(center, radius):
+        # Marks the positions where a new obstacle would overlap the given one
+        reach = int(math.ceil(obstacle_radius + radius))
+        x0, x1 = max(int(center.x) - reach - left, 0), min(int(center.x) + reach - left + 1, xs.size)
+        y0, y1 = max(int(center.y) - reach - bottom, 0), min(int(center.y) + reach - bottom + 1, ys.size)
+        dx = xs[x0:x1, np.newaxis] - center.x
+        dy = ys[np.newaxis, y0:y1] - center.y
+        free[x0:x1, y0:y1] &= np.sqrt(dx * dx + dy * dy) >= obstacle_radius + radius
+
+    for placed in obstacles:
+        block(placed.center, placed.radius)
+
+    candidates = np.flatnonzero(free)
+    order = np.random.default_rng(rng.getrandbits(64)).permutation(candidates)
+
+    for candidate in order:
+        if amount == 0:
+            break
+
+        i, j = divmod(int(candidate), ys.size)
+        if not free[i, j]:
+            continue
+
+        new_obstacle = Obstacle(Coordinate(int(xs[i]), int(ys[j])), obstacle_radius)
+        obstacles.append(new_obstacle)
+        index.insert(new_obstacle)
+        block(new_obstacle.center, obstacle_radius)
+        amount -= 1
+
+    if amount > 0:
+        raise ValueError("The given obstacle_values are not valid: there is no space left for all the obstacles")
+
+
 def distance(pair1: Coordinate, pair2: Coordinate):
     """
     Euclidean distance between two pairs of coordinates
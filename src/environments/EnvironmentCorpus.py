@@ -0,0 +1,56 @@
+from environments.Environment import Environment
+from helpers.Coordinate import Coordinate
+from helpers.RandomStreams import RandomStreams
+
+
+class EnvironmentCorpus:
+    """
+    A fixed set of environments for comparing algorithms: a number of seeded environments per obstacle density.
+
+    The environments are generated once, with their distance fields, and then only read: every algorithm and trial
+    runs on the same maps, without generating them again (the ACO environments built from them with
+    ACOEnvironment.create_from_environment reuse their distance fields).
+    """
+
+    def __init__(self, width: int, height: int, obstacle_percentages, n_envs: int, start_pos: Coordinate = None,
+                 end_pos: Coordinate = None, seed=None):
+        """
+        Generates the environments of the corpus.
+
+        :param width: Of the environments
+        :param height: Of the environments
+        :param obstacle_percentages: The obstacle values of each density, each a list of obstacle types as a pair
+        (radius, frequency)
+        :param n_envs: The number of environments per density
+        :param start_pos: Of the agents. Default: (0, 0)
+        :param end_pos: Of the agents. Default: (width - 1, height - 1)
+        :param seed: The seed of the corpus (an integer, a SeedSequence or RandomStreams, or None for a fresh one)
+        """
+
+        self.obstacle_percentages = obstacle_percentages
+        self.n_envs: int = n_envs
+        self.random_streams: RandomStreams = RandomStreams(seed)
+
+        # The environment of each density and index, with its distance field built
+        self.environments = []
+        for density, obstacle_values in enumerate(obstacle_percentages):
+            environments = Environment.create_environments(
+                width, height, obstacle_values, start_pos, end_pos,
+                [self.random_streams.integer_seed("environment", density, index) for index in range(n_envs)])
+
+            for environment in environments:
+                environment.distance_field.field.flags.writeable = False
+
+            self.environments.append(environments)
+
+    def __len__(self):
+        return len(self.environments) * self.n_envs
+
+    def environment(self, density: int, index: int) -> Environment:
+        """
+        :param density: The index of the obstacle density
+        :param index: The index of the environment for that density
+        :return: The environment, which must not be modified
+        """
+
+        return self.environments[density][index]
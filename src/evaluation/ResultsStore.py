@@ -0,0 +1,78 @@
+import sqlite3
+
+
+class ResultsStore:
+    """
+    Class keeping the results of the evaluation trials in an SQLite database, so an interrupted evaluation can be
+    resumed.
+
+    Every trial is written (and committed) as soon as it is done, under a key made of the algorithm id, the
+    fingerprint of its configuration, the obstacle density, the seed of the environment and the seed of the trial.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the store, creating it if needed.
+
+        :param path: The path of the database file (":memory:" for a store which is not saved)
+        """
+
+        self.path: str = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                algorithm TEXT NOT NULL,
+                config TEXT NOT NULL,
+                density TEXT NOT NULL,
+                environment_seed TEXT NOT NULL,
+                trial_seed TEXT NOT NULL,
+                reached INTEGER NOT NULL,
+                path_length REAL NOT NULL,
+                runtime REAL NOT NULL,
+                PRIMARY KEY (algorithm, config, density, environment_seed, trial_seed)
+            )""")
+        self._connection.commit()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, key: tuple):
+        return self.get(key) is not None
+
+    def get(self, key: tuple):
+        """
+        :param key: The algorithm id, config fingerprint, density, environment seed and trial seed of the trial
+        :return: Whether the path reached the end, the length of the path and the runtime, or None if not stored
+        """
+
+        row = self._connection.execute(
+            "SELECT reached, path_length, runtime FROM results WHERE algorithm = ? AND config = ? AND density = ? "
+            "AND environment_seed = ? AND trial_seed = ?", tuple(str(part) for part in key)).fetchone()
+
+        if row is None:
+            return None
+
+        return bool(row[0]), row[1], row[2]
+
+    def add(self, key: tuple, reached: bool, path_length: float, runtime: float):
+        """
+        Stores the result of a trial, replacing the previous one with the same key.
+
+        :param key: The algorithm id, config fingerprint, density, environment seed and trial seed of the trial
+        :param reached: Whether the path reached the end
+        :param path_length: The length of the path
+        :param runtime: The runtime of the algorithm
+        """
+
+        self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (*(str(part) for part in key), int(reached), float(path_length), float(runtime)))
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,4 +1,6 @@
-import time
+import hashlib
+import json
+import os
 
 import pandas as pd
 import numpy as np
@@ -9,17 +11,24 @@ from algorithms.Algorithm import Algorithm
 from algorithms.AntColonyOptimization import AntColonyOptimization
 from algorithms.FireflyAlgorithm import FireflyAlgorithm
 from algorithms.ParticleSwarmOptimization import ParticleSwarmOptimization
-from environments.ACOEnvironment import ACOEnvironment
-from environments.Environment import Environment
+from environments.EnvironmentCorpus import EnvironmentCorpus
+from evaluation.ResultsStore import ResultsStore
+from helpers.Executor import Executor
 from helpers.PathSpecification import PathSpecification
+from helpers.ProcessExecutor import ProcessExecutor
+from helpers.RandomStreams import RandomStreams
+from helpers.RunCache import RunCache
+from helpers.SerialExecutor import SerialExecutor
 
 
-def obtain_algo(algo_id, environment) -> Algorithm:
+def obtain_algo(algo_id, environment, seed=None, executor: Executor = None) -> Algorithm:
     """
     Returns the algorithm object based on the algo_id
 
     :param algo_id: The algorithm id
     :param environment: The environment object
+    :param seed: The seed of the algorithm (see Algorithm)
+    :param executor: The executor of the ants, for the ACO algorithms. Default: their own pool of processes
 
     :return: The algorithm object
     """
@@ -31,7 +40,7 @@ def obtain_algo(algo_id, environment) -> Algorithm:
                                      CONFIG.algos["aco"].aco_no_change_iter,
                                      CONFIG.train_config.trail,
                                      CONFIG.train_config.step_size,
-                                     obstacle_distance=CONFIG.env.obstacle_distance)
+                                     obstacle_distance=CONFIG.env.obstacle_distance, executor=executor, seed=seed)
     elif algo_id == "adpe_aco":
         return AdpeAntColonyOptimization(environment, CONFIG.algos["aco"].aco_agents_per_generation,
                                          CONFIG.algos["aco"].aco_no_generations, CONFIG.algos["aco"].aco_q,
@@ -40,103 +49,178 @@ def obtain_algo(algo_id, environment) -> Algorithm:
                                          CONFIG.train_config.trail,
                                          CONFIG.train_config.step_size,
                                          obstacle_distance=CONFIG.env.obstacle_distance,
-                                         default_elitist_probability=CONFIG.algos["aco"].aco_sigma_elite)
+                                         default_elitist_probability=CONFIG.algos["aco"].aco_sigma_elite,
+                                         executor=executor, seed=seed)
     elif algo_id == "pso":
         return ParticleSwarmOptimization(environment, CONFIG.algos["pso"].pso_num_particles,
                                          CONFIG.train_config.convergence_iter, CONFIG.train_config.trail,
                                          CONFIG.train_config.step_size, CONFIG.algos["pso"].pso_inertia_weight,
                                          CONFIG.algos["pso"].pso_num_iterations,
-                                         obstacle_distance=CONFIG.env.obstacle_distance)
+                                         obstacle_distance=CONFIG.env.obstacle_distance, seed=seed)
     elif algo_id == "firefly":
         return FireflyAlgorithm(environment, CONFIG.algos["firefly"].fa_population_size,
                                 CONFIG.algos["firefly"].fa_alpha_init, CONFIG.algos["firefly"].fa_alpha_final,
                                 CONFIG.algos["firefly"].fa_gamma_init, CONFIG.algos["firefly"].fa_gamma_final,
                                 CONFIG.algos["firefly"].fa_beta, CONFIG.algos["firefly"].fa_max_iter,
                                 CONFIG.train_config.step_size,
-                                obstacle_distance=CONFIG.env.obstacle_distance)
+                                obstacle_distance=CONFIG.env.obstacle_distance, seed=seed)
     else:
         raise ValueError("Invalid algo_id")
 
 
-def evaluate(obstacle_percentages, n_envs, trials, verbose=0):
+def config_fingerprint(algo_id) -> str:
+    """
+    :param algo_id: The algorithm id
+    :return: A fingerprint of the configuration the algorithm is built with (see obtain_algo)
+    """
+
+    settings = json.dumps(CONFIG.algorithm_settings(algo_id), sort_keys=True)
+
+    return hashlib.blake2b(settings.encode(), digest_size=16).hexdigest()
+
+
+def cell_key(streams: RandomStreams, obstacle_percentages, cell, config: str) -> tuple:
+    """
+    :param streams: The random streams of the evaluation
+    :param obstacle_percentages: The obstacle percentages
+    :param cell: The algorithm id, and the indices of the obstacle density, of the environment and of the trial
+    :param config: The fingerprint of the configuration of the algorithm
+    :return: The key of the cell in a ResultsStore
+    """
+
+    algo_id, density, index, trial = cell
+
+    return (algo_id, config, str(obstacle_percentages[density]),
+            format(streams.integer_seed("environment", density, index), "x"),
+            format(streams.integer_seed("algorithm", algo_id, density, index, trial), "x"))
+
+
+def evaluate_cell(settings, cell) -> (bool, float, float):
+    """
+    Runs one trial of an algorithm on one environment. Every cell has its own seed, so its result does not depend on
+    which process runs it, nor on the cells run before.
+
+    :param settings: The random streams of the evaluation, its environment corpus, whether the cells run in parallel,
+    and the cache of the runs (or None)
+    :param cell: The algorithm id, and the indices of the obstacle density, of the environment and of the trial
+
+    :return: Whether the path reached the end, the length of the path and the runtime of the algorithm
+    """
+
+    streams, corpus, parallel, cache = settings
+    algo_id, density, index, trial = cell
+
+    # The ACO algorithms make their own ACOEnvironment from it, reusing its distance field
+    environment = corpus.environment(density, index)
+    path_specification = PathSpecification(CONFIG.env.start_pos, CONFIG.env.end_pos)
+
+    # The processes of the evaluation cannot start processes of their own (and would oversubscribe the cores),
+    # so the ants run in the cell's process
+    executor = SerialExecutor() if parallel else None
+    algo: Algorithm = obtain_algo(algo_id, environment, streams.child("algorithm", algo_id, density, index, trial),
+                                  executor)
+
+    # Run the algorithm (or take the cached run), timing it
+    path, checkpoints = algo.cached_run(path_specification, cache)
+    runtime = algo.trace.runtime
+
+    reached = path.last() == path_specification.end
+
+    return reached, path.size(), runtime
+
+
+def evaluate(obstacle_percentages, n_envs, trials, verbose=0, workers: int = 1, seed=None,
+             store: ResultsStore = None, cache: RunCache = None):
     """
     Evaluates the algorithms for the given obstacle percentages
 
+    Every (algorithm, obstacle percentage, environment, trial) cell is independent, and seeded from the seed of the
+    evaluation: with the same seed, the results (except for the times) are the same whatever the number of workers.
+    The environments are generated once, and all the algorithms are evaluated on the same ones.
+
+    With a results store, every trial is saved as soon as it is done, and the trials already in the store (with the
+    same seed and configuration) are not run again: an interrupted evaluation resumes where it stopped, and adding an
+    algorithm only runs its trials.
+
     :param obstacle_percentages: The obstacle percentages
     :param n_envs: The number of environments per obstacle percentage
     :param trials: The number of trials per environment
     :param verbose: The verbosity level
+    :param workers: The number of processes running the cells. With more than one, the ants of the ACO algorithms
+    run in the process of their cell, instead of a pool of their own
+    :param seed: The seed of the evaluation (an integer, or None for a fresh one, which cannot be resumed)
+    :param store: The store of the results of the trials, if any
+    :param cache: The cache of the algorithm runs, if any (the times of the cached runs are the ones they took)
 
     :return: The results dataframe.
     The columns are the algorithms and the rows are the obstacle percentages.
     """
 
-    # Initialize the results' dictionary
-    results = {}
-
-    # Loop over the algorithms
-    for algo_id in CONFIG.ALGORITHMS:
-        # Initialize the list of path lengths for the current algorithm
-        path_lengths = []
-
-        if verbose >= 1:
-            print(f"Evaluating {algo_id}...")
+    streams = RandomStreams(seed)
+    parallel = workers > 1
 
-        # Loop over the obstacle percentages
-        for obstacle_percentage in obstacle_percentages:
-            # Initialize the list of metric values for the current obstacle percentage
-            metric_values = {"path_length": [], "time": [], "reachability": []}
+    corpus = EnvironmentCorpus(CONFIG.env.width, CONFIG.env.height, obstacle_percentages, n_envs,
+                               CONFIG.env.start_pos, CONFIG.env.end_pos, streams)
 
-            if verbose >= 1:
-                print(f"For the obstacle percentage: {obstacle_percentage}")
+    cells = [(algo_id, density, index, trial)
+             for algo_id in CONFIG.ALGORITHMS
+             for density in range(len(obstacle_percentages))
+             for index in range(n_envs)
+             for trial in range(trials)]
 
-            # We generate n_envs environments
-            for i in range(n_envs):
-                # Create the environment
-                environment = Environment.create_environment(CONFIG.env.width, CONFIG.env.height,
-                                                             obstacle_percentage, start_pos=CONFIG.env.start_pos,
-                                                             end_pos=CONFIG.env.end_pos)
-                if algo_id == "aco":
-                    environment = ACOEnvironment.create_from_environment(environment)
+    # The trials already done, if stored
+    outcomes = [None] * len(cells)
+    keys = None
+    if store is not None:
+        configs = {algo_id: config_fingerprint(algo_id) for algo_id in CONFIG.ALGORITHMS}
+        keys = [cell_key(streams, obstacle_percentages, cell, configs[cell[0]]) for cell in cells]
+        outcomes = [store.get(key) for key in keys]
 
-                path_specification = PathSpecification(CONFIG.env.start_pos, CONFIG.env.end_pos)
+    pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
 
-                algo: Algorithm = obtain_algo(algo_id, environment)
+    if verbose >= 1:
+        print(f"Evaluating {len(pending)} runs ({len(cells) - len(pending)} already done) on {workers} worker(s)...")
 
-                # Run the algorithm trials times for the current obstacle percentage
-                for _ in range(trials):
-                    # Start timer
-                    start_time = time.time()
+    if pending:
+        executor = ProcessExecutor(workers) if parallel else SerialExecutor()
+        with executor:
+            executor.start((streams, corpus, parallel, cache))
 
-                    # Run the algorithm
-                    path, checkpoints = algo.run(path_specification, print_progress=False)
+            for i, outcome in zip(pending, executor.imap(evaluate_cell, [cells[i] for i in pending])):
+                outcomes[i] = outcome
+                if store is not None:
+                    store.add(keys[i], *outcome)
 
-                    # Stop the timer and calculate the elapsed time
-                    runtime = time.time() - start_time
+    # Initialize the list of metric values for every algorithm and obstacle percentage
+    metric_values = {}
+    for (algo_id, density, _, _), (reached, path_length, runtime) in zip(cells, outcomes):
+        values = metric_values.setdefault((algo_id, density), {"path_length": [], "time": [], "reachability": []})
 
-                    reached = path.get_path()[-1] == path_specification.end
+        if reached:
+            values["path_length"].append(path_length)
 
-                    if reached:
-                        metric_values["path_length"].append(path.size())
+        values["reachability"].append(reached)
+        values["time"].append(runtime)
 
-                    metric_values["reachability"].append(reached)
-                    metric_values["time"].append(runtime)
+    # Initialize the results' dictionary
+    results = {}
 
-                if verbose >= 1:
-                    print(f"Environment {i + 1} done...")
+    for (algo_id, density), values_per_metric in metric_values.items():
+        if verbose >= 1:
+            print(f"{algo_id} done for the obstacle percentage: {obstacle_percentages[density]}")
 
-            for metric, values in metric_values.items():
-                # Calculate the mean and standard deviation of the metric values
-                mean = np.mean(values)
-                std = np.std(values)
+        for metric, values in values_per_metric.items():
+            # Calculate the mean and standard deviation of the metric values
+            mean = np.mean(values)
+            std = np.std(values)
 
-                key = (str(obstacle_percentage), metric)
+            key = (str(obstacle_percentages[density]), metric)
 
-                if key not in results:
-                    results[key] = {}
+            if key not in results:
+                results[key] = {}
 
-                # Add the mean and standard deviation to the results' dictionary
-                results[key][algo_id] = (mean, std)
+            # Add the mean and standard deviation to the results' dictionary
+            results[key][algo_id] = (mean, std)
 
     # Convert the results' dictionary to a pandas DataFrame and print it
     df = pd.DataFrame(results)
@@ -154,8 +238,10 @@ if '__main__' == __name__:
     trials = 20  # We run each algorithm 20 times per environment
     verbose = 1
 
-    # Evaluate the algorithms
-    results = evaluate(obstacle_percentages, n_envs, trials, verbose=verbose)
+    # Evaluate the algorithms, on every core, saving the trials so an interrupted evaluation can be resumed
+    with ResultsStore("results.db") as store:
+        results = evaluate(obstacle_percentages, n_envs, trials, verbose=verbose, workers=os.cpu_count(), seed=0,
+                           store=store)
 
     if verbose >= 1:
         # Print the results
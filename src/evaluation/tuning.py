@@ -2,7 +2,6 @@ from typing import Any
 
 import numpy as np
 import optuna
-from numpy.random import PCG64
 
 from Config import CONFIG
 from algorithms.AdpeAntColonyOptimization import AdpeAntColonyOptimization
@@ -11,9 +10,11 @@ from algorithms.FireflyAlgorithm import FireflyAlgorithm
 from algorithms.ParticleSwarmOptimization import ParticleSwarmOptimization
 from environments.Environment import Environment
 from helpers.PathSpecification import PathSpecification
+from helpers.RandomStreams import RandomStreams
+from helpers.RunCache import RunCache
 
 
-def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
+def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id, seed: int = 0, cache: RunCache = None):
     """
     Objective function for the hyperparameter tuning
 
@@ -21,12 +22,13 @@ def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
     :param obstacle_percentages: percentage of obstacles in the environment
     :param n_envs: number of environments to run
     :param algo_id: algorithm to tune
+    :param seed: seed of the environments and of the runs, the same for every trial so the trials are comparable
+    :param cache: cache of the runs, so the runs already done (e.g. when tuning again) are not computed again
 
     :return: The size of the shortest path (i.e. the objective function to minimize)
     """
 
-    # random seed
-    seed = PCG64()
+    streams = RandomStreams(seed)
 
     results = []
 
@@ -35,7 +37,8 @@ def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
         environment = (
             Environment.create_environment(CONFIG.env.width, CONFIG.env.height,
                                            obstacle_values=obstacle_percentages, start_pos=CONFIG.env.start_pos,
-                                           end_pos=CONFIG.env.end_pos, seed=seed))
+                                           end_pos=CONFIG.env.end_pos, seed=streams.integer_seed("environment", i)))
+        algorithm_seed = streams.child("algorithm", i)
         spec = PathSpecification(CONFIG.env.start_pos, CONFIG.env.end_pos)
 
         # Select the correct algorithm
@@ -49,7 +52,8 @@ def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
                                          no_change_iter=CONFIG.algos["aco"].aco_no_change_iter,
                                          trail=trial.suggest_float("trail", 0.1, 1.0),
                                          step_size=CONFIG.train_config.step_size,
-                                         num_processes=6)
+                                         num_processes=6,
+                                         seed=algorithm_seed)
         elif algo_id == "adpe_aco":
             algo = AdpeAntColonyOptimization(environment,
                                              20,
@@ -61,7 +65,8 @@ def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
                                              no_change_iter=CONFIG.algos["aco"].aco_no_change_iter,
                                              trail=trial.suggest_float("trail", 0.1, 1.0),
                                              step_size=CONFIG.train_config.step_size,
-                                             num_processes=6)
+                                             num_processes=6,
+                                             seed=algorithm_seed)
         elif algo_id == "pso":
             algo = ParticleSwarmOptimization(environment,
                                              num_particles=CONFIG.algos["pso"].pso_num_particles,
@@ -69,7 +74,8 @@ def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
                                              trail=trial.suggest_float("trail", 0.1, 1.0),
                                              step_size=CONFIG.train_config.step_size,
                                              inertia_weight=trial.suggest_float("inertia_weight", 0.1, 1.0),
-                                             max_iter=CONFIG.train_config.convergence_iter)
+                                             max_iter=CONFIG.train_config.convergence_iter,
+                                             seed=algorithm_seed)
         elif algo_id == "firefly":
             algo = FireflyAlgorithm(environment,
                                     population_size=CONFIG.algos["firefly"].fa_population_size,
@@ -79,21 +85,24 @@ def objective(trial: optuna.Trial, obstacle_percentages, n_envs, algo_id):
                                     gamma_end=trial.suggest_float("gamma_end", 3.0, 10.0),
                                     beta=trial.suggest_float("beta", 0.0, 1.0),
                                     max_iter=CONFIG.train_config.convergence_iter,
-                                    step_size=CONFIG.train_config.step_size)
+                                    step_size=CONFIG.train_config.step_size,
+                                    seed=algorithm_seed)
         else:
             raise ValueError("Invalid algorithm")
 
         # Obtain the shortest path length
-        shortest_path, checkpoints = algo.run(spec, print_progress=False)
+        shortest_path, checkpoints = algo.cached_run(spec, cache)
         results.append(shortest_path.size())
 
     return np.mean(results)
 
 
-def tune(obstacle_percentages, n_envs, algo, n_trials=100, verbose: int = 0) -> dict[str, Any]:
-    study = optuna.create_study(direction="minimize")
+def tune(obstacle_percentages, n_envs, algo, n_trials=100, verbose: int = 0, seed: int = 0,
+         cache: RunCache = None) -> dict[str, Any]:
+    # A seeded sampler suggests the same parameters when tuning again, whose runs are then cached
+    study = optuna.create_study(direction="minimize", sampler=optuna.samplers.TPESampler(seed=seed))
 
-    study.optimize(lambda trial: objective(trial, obstacle_percentages, n_envs, algo), n_trials=n_trials)
+    study.optimize(lambda trial: objective(trial, obstacle_percentages, n_envs, algo, seed, cache), n_trials=n_trials)
 
     pruned_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.PRUNED]
     complete_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
@@ -120,9 +129,10 @@ if '__main__' == __name__:
     n_envs = 4
     n_trials = 100
     best_params = {}
+    cache = RunCache(".run_cache")
 
     for algo in CONFIG.ALGORITHMS:
         print(f"Tuning {algo}")
-        best_params.update(tune(obstacle_percentages, n_envs, algo, n_trials=n_trials, verbose=0))
+        best_params.update(tune(obstacle_percentages, n_envs, algo, n_trials=n_trials, verbose=0, cache=cache))
 
     print(best_params)
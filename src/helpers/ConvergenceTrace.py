@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+
+
+class ConvergenceTrace:
+    """
+    Class recording how a run of an algorithm converges, at the generations of a schedule.
+
+    At each scheduled generation, the trace records the length of the best path so far, the time since the start of
+    the run, the number of evaluations (paths or positions evaluated) so far, and the number of feasible paths (agents
+    which reached the end) in that generation. The records are kept in arrays allocated once for the whole run, so
+    recording costs no allocation, and the traces of different algorithms line up generation by generation.
+    """
+
+    # The default schedule: the generations 1, 3, 5 and 9, and then every 10 generations (counting from 1)
+    GENERATIONS = (1, 3, 5, 9)
+    PERIOD = 10
+
+    def __init__(self, max_generations: int, generations=GENERATIONS, period: int = PERIOD):
+        """
+        Constructs the trace, and starts its clock.
+
+        :param max_generations: The maximum number of generations of the run
+        :param generations: The (1-based) generations to record
+        :param period: Every how many generations to record as well, or None to only record the given generations
+        """
+
+        self.generations = frozenset(generations)
+        self.period: int = period
+
+        size = sum(1 for generation in range(max_generations) if self.scheduled(generation))
+
+        self.generation: np.ndarray = np.empty(size, dtype=np.int64)
+        self.best_length: np.ndarray = np.empty(size, dtype=np.float64)
+        self.time: np.ndarray = np.empty(size, dtype=np.float64)
+        self.evaluations: np.ndarray = np.empty(size, dtype=np.int64)
+        self.feasible: np.ndarray = np.empty(size, dtype=np.int64)
+        self._count = 0
+
+        # The total time of the run, once known (see Algorithm.cached_run)
+        self.runtime: float = None
+
+        self._start = time.perf_counter()
+
+    def __len__(self):
+        return self._count
+
+    def scheduled(self, generation: int) -> bool:
+        """
+        :param generation: The (0-based) generation
+        :return: Whether the generation is recorded
+        """
+
+        generation += 1
+
+        return generation in self.generations or (self.period is not None and generation % self.period == 0)
+
+    def record(self, generation: int, best_length: float, evaluations: int, feasible: int) -> bool:
+        """
+        Records a generation, if it is scheduled.
+
+        :param generation: The (0-based) generation
+        :param best_length: The length of the best path so far, or None if there is none yet
+        :param evaluations: The number of evaluations since the start of the run
+        :param feasible: The number of feasible paths found in the generation
+        :return: Whether the generation was recorded
+        """
+
+        if not self.scheduled(generation) or self._count == len(self.generation):
+            return False
+
+        i = self._count
+        self.generation[i] = generation
+        self.best_length[i] = np.nan if best_length is None else best_length
+        self.time[i] = time.perf_counter() - self._start
+        self.evaluations[i] = evaluations
+        self.feasible[i] = feasible
+        self._count += 1
+
+        return True
+
+    def checkpoints(self) -> list:
+        """
+        :return: The best path lengths recorded (the generations without a path yet are left out)
+        """
+
+        best_length = self.best_length[:self._count]
+
+        return best_length[~np.isnan(best_length)].tolist()
+
+    def as_dict(self) -> dict:
+        """
+        :return: The records, as a dictionary of arrays (e.g. for a pandas DataFrame)
+        """
+
+        return {
+            "generation": self.generation[:self._count].copy(),
+            "best_length": self.best_length[:self._count].copy(),
+            "time": self.time[:self._count].copy(),
+            "evaluations": self.evaluations[:self._count].copy(),
+            "feasible": self.feasible[:self._count].copy(),
+        }
@@ -1,13 +1,18 @@
 import math
 
-from helpers.Direction import Direction
+from helpers.Direction import DIRECTIONS, DIRECTION_DELTAS
 
 
 class Coordinate:
     """
     Class representing a coordinate.
+
+    Coordinates are created in large numbers by the agents, so they only have slots for x and y. They are hashable
+    (and must not be modified once used as a key).
     """
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
         """
         Constructs a new coordinate object.
@@ -38,7 +43,9 @@ class Coordinate:
         :return: The new coordinate
         """
 
-        return self.add_coordinate(self.dir_to_coordinate_delta(direction), step_size)
+        dx, dy = DIRECTION_DELTAS[direction.value]
+
+        return Coordinate(self.x + dx * step_size, self.y + dy * step_size)
 
     def subtract_coordinate(self, other):
         """
@@ -58,7 +65,9 @@ class Coordinate:
         :return: The new coordinate
         """
 
-        return self.subtract_coordinate(self.dir_to_coordinate_delta(direction))
+        dx, dy = DIRECTION_DELTAS[direction.value]
+
+        return Coordinate(self.x - dx, self.y - dy)
 
     def __str__(self):
         """
@@ -77,8 +86,14 @@ class Coordinate:
         :return: Boolean (whether they're equal)
         """
 
+        if not isinstance(other, Coordinate):
+            return NotImplemented
+
         return self.x == other.x and self.y == other.y
 
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def x_between(self, low, up):
         """
         Check whether a point x lies within the range [low,up)
@@ -120,21 +135,14 @@ class Coordinate:
         Get vector (coordinate) of a certain direction.
         """
 
-        # All directions in a vector
-        # Creates a map with a direction linked to its (direction) vector.
-        vector = self.get_all_directions()
-
-        return vector[direction]
+        return Coordinate(*DIRECTION_DELTAS[direction.value])
 
     def get_all_directions(self):
         """
         :return: All directions: up, up_right, right, down_right, down, down_left, left, up_left.
         """
 
-        return {Direction.up: Coordinate(0, 1), Direction.up_right: Coordinate(1, 1),
-                Direction.right: Coordinate(1, 0), Direction.down_right: Coordinate(1, -1),
-                Direction.down: Coordinate(0, -1), Direction.down_left: Coordinate(-1, -1),
-                Direction.left: Coordinate(-1, 0), Direction.up_left: Coordinate(-1, 1)}
+        return {direction: Coordinate(*DIRECTION_DELTAS[direction.value]) for direction in DIRECTIONS}
 
     def move_in_direction(self, angle, distance):
         """
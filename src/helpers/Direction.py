@@ -29,3 +29,10 @@ class Direction(enum.Enum):
         """
 
         return direction.value
+
+
+# All the directions, indexed by their value (faster than calling Direction(i))
+DIRECTIONS = tuple(Direction)
+
+# Unit (x, y) move of each direction, indexed by its value
+DIRECTION_DELTAS = ((0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1))
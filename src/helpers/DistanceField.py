@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+
+from helpers.ObstacleIndex import ObstacleIndex
+
+
+class DistanceField:
+    """
+    Class representing a precomputed distance field over the cells of an environment.
+
+    The field stores, for every integer cell (x, y), the distance to the center of the closest obstacle, or -1 if the
+    cell collides with an obstacle.
+    """
+
+    # Number of cells computed at once when building the field, to keep memory bounded on large maps
+    CHUNK_CELLS = 1 << 20
+
+    def __init__(self, width: int, height: int, obstacle_index: ObstacleIndex, max_distance: float):
+        """
+        Builds the field from the spatial index of the obstacles.
+
+        :param width: Of the environment
+        :param height: Of the environment
+        :param obstacle_index: The spatial index over the obstacles of the environment
+        :param max_distance: The distance reported when no obstacle is closer than this value
+        """
+
+        self.width: int = width
+        self.height: int = height
+        self.field: np.ndarray = np.empty((width, height), dtype=np.float64)
+
+        ys = np.arange(height, dtype=np.float64)
+        columns = max(1, self.CHUNK_CELLS // max(1, height))
+
+        for x0 in range(0, width, columns):
+            xs = np.arange(x0, min(width, x0 + columns), dtype=np.float64)
+            grid_x, grid_y = np.meshgrid(xs, ys, indexing="ij")
+            self.field[x0:x0 + xs.size] = obstacle_index.distances(grid_x, grid_y, max_distance)
+
+    def value(self, x: float, y: float) -> float:
+        """
+        Distance at a position inside the environment. Integer positions are a direct lookup, while float
+        positions are bilinearly interpolated from the four surrounding cells (and considered colliding if any of
+        them collides).
+
+        :param x: The x position, within [0, width)
+        :param y: The y position, within [0, height)
+        :return: The (approximate, for float positions) distance at the position, or -1 if colliding
+        """
+
+        if float(x).is_integer() and float(y).is_integer():
+            return float(self.field[int(x), int(y)])
+
+        x0 = min(int(math.floor(x)), self.width - 1)
+        y0 = min(int(math.floor(y)), self.height - 1)
+        x1 = min(x0 + 1, self.width - 1)
+        y1 = min(y0 + 1, self.height - 1)
+        tx = x - x0
+        ty = y - y0
+
+        corners = self.field[[x0, x1, x0, x1], [y0, y0, y1, y1]]
+        if (corners < 0).any():
+            return -1.0
+
+        bottom = corners[0] * (1 - tx) + corners[1] * tx
+        top = corners[2] * (1 - tx) + corners[3] * tx
+
+        return float(bottom * (1 - ty) + top * ty)
+
+    def occupancy(self) -> np.ndarray:
+        """
+        :return: A boolean (width, height) mask, True for the cells colliding with an obstacle
+        """
+
+        return self.field < 0
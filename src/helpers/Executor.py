@@ -0,0 +1,67 @@
+class Executor:
+    """
+    Simple executor class, from where all the specific executors are implemented.
+
+    An executor runs the tasks of an algorithm, possibly in parallel. The data that does not change between tasks
+    (the state, e.g. the algorithm itself) is handed over once with start, and every task is then run as
+    function(state, task).
+    """
+
+    # Whether the tasks see the state object itself, rather than a copy of it
+    shares_state: bool = True
+
+    def __init__(self, workers: int = 1):
+        """
+        Constructor for the executor.
+
+        :param workers: How many tasks can run at the same time
+        """
+
+        self.workers: int = workers
+        self.state = None
+
+    def start(self, state):
+        """
+        Hands the state over to the executor. Starting again with the same state object keeps the executor as is.
+
+        :param state: The data shared by all the tasks
+        """
+
+        self.state = state
+
+    def map(self, function, tasks) -> list:
+        """
+        Runs function(state, task) for every task.
+
+        :param function: The function to run (picklable, i.e. defined at the top level of a module or a class)
+        :param tasks: The arguments of each call
+        :return: The results, in the order of the tasks
+        """
+
+        raise NotImplementedError
+
+    def imap(self, function, tasks):
+        """
+        Runs function(state, task) for every task, handing out each result as soon as it (and the ones before) is
+        ready.
+
+        :param function: The function to run (picklable, i.e. defined at the top level of a module or a class)
+        :param tasks: The arguments of each call
+        :return: An iterator over the results, in the order of the tasks
+        """
+
+        for task in tasks:
+            yield from self.map(function, [task])
+
+    def close(self):
+        """
+        Releases the resources of the executor. It can be started again afterwards.
+        """
+
+        self.state = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
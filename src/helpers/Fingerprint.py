@@ -0,0 +1,54 @@
+import hashlib
+import json
+
+import numpy as np
+
+from helpers.Coordinate import Coordinate
+from helpers.Obstacle import Obstacle
+
+
+def canonical(value):
+    """
+    Converts a value to plain JSON data, the same for equal values (e.g. a Coordinate becomes [x, y]).
+
+    :param value: The value (None, a number, a string, a Coordinate, an Obstacle, an array, a list, a tuple, a set, a
+    dictionary, or an object with a fingerprint method)
+    :return: The JSON data
+    """
+
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, (float, np.floating)):
+        # repr keeps every digit, and tells the floats from the integers
+        return repr(float(value))
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, Coordinate):
+        return ["Coordinate", canonical(value.x), canonical(value.y)]
+    if isinstance(value, Obstacle):
+        return ["Obstacle", canonical(value.center), canonical(value.radius)]
+    if isinstance(value, np.ndarray):
+        return ["ndarray", str(value.dtype), list(value.shape), hashlib.blake2b(value.tobytes()).hexdigest()]
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((canonical(item) for item in value), key=json.dumps)
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in value.items()}
+    if hasattr(value, "fingerprint"):
+        return ["fingerprint", value.fingerprint()]
+
+    raise TypeError(f"Cannot fingerprint a value of type {type(value).__name__}")
+
+
+def fingerprint(*values) -> str:
+    """
+    Stable fingerprint of some values: the same across processes and sessions, for equal values.
+
+    :param values: The values (see canonical)
+    :return: The fingerprint, as 32 hexadecimal digits
+    """
+
+    data = json.dumps(canonical(values), sort_keys=True, separators=(",", ":"))
+
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
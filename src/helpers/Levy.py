@@ -1,22 +1,60 @@
+import math
+
 import numpy as np
 
 
-def levy_flight(beta: float, size: int):
+def levy_flight(beta: float, size, rng=None, clip: float = 2):
     """
     Generate a step length from a Levy distribution.
 
     :param beta: the beta parameter of the Levy distribution
-    :param size: the number of samples to generate
+    :param size: the number (or shape, as a tuple) of samples to generate
+    :param rng: the random number generator (a numpy Generator, or the np.random module). Default: np.random
+    :param clip: the steps are clipped to [-clip, clip], or not at all if None. Default: 2 (obstacle radius)
     :return: the step lengths
     """
 
+    if rng is None:
+        rng = np.random
+
     # Draw samples from a uniform distribution
-    u = np.random.uniform(0.01, 1, size=size)
+    u = rng.uniform(0.01, 1, size=size)
 
     # Calculate the corresponding step lengths
     steps = u ** (-1 / beta)
 
-    # Make sure the steps are between -2 and 2 (obstacle radius)
-    steps = np.clip(steps, -2, 2)
+    # Make sure the steps are between -clip and clip
+    if clip is not None:
+        steps = np.clip(steps, -clip, clip)
+
+    return steps
+
+
+def mantegna_flight(beta: float, size, rng=None, clip: float = 2):
+    """
+    Generate a step from a symmetric Levy stable distribution, with Mantegna's algorithm. Unlike levy_flight, the
+    steps can be negative.
+
+    :param beta: the beta parameter of the Levy distribution, in (0, 2]
+    :param size: the number (or shape, as a tuple) of samples to generate
+    :param rng: the random number generator (a numpy Generator, or the np.random module). Default: np.random
+    :param clip: the steps are clipped to [-clip, clip], or not at all if None. Default: 2 (obstacle radius)
+    :return: the steps
+    """
+
+    if rng is None:
+        rng = np.random
+
+    # Scale of the numerator, so that the ratio follows the Levy distribution
+    sigma = (math.gamma(1 + beta) * math.sin(math.pi * beta / 2) /
+             (math.gamma((1 + beta) / 2) * beta * 2 ** ((beta - 1) / 2))) ** (1 / beta)
+
+    u = rng.normal(0, sigma, size=size)
+    v = rng.normal(0, 1, size=size)
+
+    steps = u / np.abs(v) ** (1 / beta)
+
+    if clip is not None:
+        steps = np.clip(steps, -clip, clip)
 
     return steps
@@ -0,0 +1,73 @@
+import numpy as np
+
+from helpers.Levy import levy_flight, mantegna_flight
+
+
+class LevySampler:
+    """
+    Class handing out 2D Lévy flight steps, from a buffer of steps.
+
+    The steps are drawn from the random number generator in blocks, ahead of time, so a swarm takes the steps of all
+    its agents (or an agent its single step) without a call into NumPy for every move.
+    """
+
+    # The distributions of the steps
+    METHODS = {"power": levy_flight, "mantegna": mantegna_flight}
+
+    def __init__(self, rng=None, beta: float = 1.5, method: str = "power", clip: float = 2, block_size: int = 1024):
+        """
+        Constructs the sampler.
+
+        :param rng: The random number generator (a numpy Generator, or the np.random module). Default: np.random
+        :param beta: The beta parameter of the Lévy distribution
+        :param method: "power" for the distribution of levy_flight, or "mantegna" for mantegna_flight
+        :param clip: The steps are clipped to [-clip, clip], or not clipped if None
+        :param block_size: How many steps are drawn at once
+        """
+
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown Lévy flight method: {method}")
+
+        self.rng = np.random if rng is None else rng
+        self.beta: float = beta
+        self.method: str = method
+        self.clip: float = clip
+        self.block_size: int = block_size
+        self._buffer: np.ndarray = np.empty((0, 2), dtype=np.float64)
+        self._next = 0
+
+    def _draw(self, count: int) -> np.ndarray:
+        """
+        :param count: How many steps to draw
+        :return: The steps, freshly drawn from the random number generator
+        """
+
+        return self.METHODS[self.method](self.beta, (count, 2), rng=self.rng, clip=self.clip)
+
+    def steps(self, count: int) -> np.ndarray:
+        """
+        :param count: How many steps to hand out
+        :return: A (count, 2) array of steps, which must not be modified in place
+        """
+
+        available = len(self._buffer) - self._next
+
+        if count > available:
+            # Whatever is left in the buffer comes first, so no step is wasted
+            drawn = self._draw(max(self.block_size, count - available))
+            self._buffer = np.concatenate((self._buffer[self._next:], drawn))
+            self._next = 0
+
+        steps = self._buffer[self._next:self._next + count]
+        self._next += count
+
+        return steps
+
+    def step(self) -> (float, float):
+        """
+        :return: A single (x, y) step
+        """
+
+        x, y = self.steps(1)[0].tolist()
+
+        return x, y
@@ -0,0 +1,286 @@
+import math
+
+import numpy as np
+
+
+class ObstacleIndex:
+    """
+    Class representing a spatial index over the obstacles of an environment.
+
+    Obstacles are hashed by their center into a uniform grid of square cells, so nearest-obstacle and collision
+    queries only look at the cells around the queried position instead of every obstacle. The answers are exact
+    for any (float) position.
+    """
+
+    def __init__(self, obstacles=None, cell_size: float = None):
+        """
+        Constructs the index.
+
+        :param obstacles: The obstacles to index (each of type Obstacle)
+        :param cell_size: The side of the grid cells. Default: twice the largest obstacle radius (at least 1)
+        """
+
+        obstacles = [] if obstacles is None else list(obstacles)
+
+        if cell_size is None:
+            cell_size = max([1.0] + [2 * obstacle.radius for obstacle in obstacles])
+
+        self.cell_size: float = cell_size
+        self.max_radius: float = 0.0
+        self.size: int = 0
+
+        # Cell -> list of (x, y, radius) of the obstacles whose center lies in the cell
+        self._cells = {}
+
+        # Bounding box (in cells) of the occupied cells, used to stop searching once everything has been seen
+        self._min_cell = None
+        self._max_cell = None
+
+        # Array layout of the cells for the batched queries, built lazily
+        self._arrays = None
+
+        for obstacle in obstacles:
+            self.insert(obstacle)
+
+    def insert(self, obstacle):
+        """
+        Adds an obstacle to the index.
+
+        :param obstacle: The obstacle to be added
+        """
+
+        x = obstacle.center.x
+        y = obstacle.center.y
+        cell = self._cell(x, y)
+
+        self._cells.setdefault(cell, []).append((x, y, obstacle.radius))
+        self.max_radius = max(self.max_radius, obstacle.radius)
+        self.size += 1
+        self._arrays = None
+
+        if self._min_cell is None:
+            self._min_cell = cell
+            self._max_cell = cell
+        else:
+            self._min_cell = (min(self._min_cell[0], cell[0]), min(self._min_cell[1], cell[1]))
+            self._max_cell = (max(self._max_cell[0], cell[0]), max(self._max_cell[1], cell[1]))
+
+    def distance(self, x: float, y: float, max_distance: float = math.inf) -> float:
+        """
+        Exact distance from a position to the center of the closest obstacle, or -1 if the position collides with
+        an obstacle.
+
+        Cells are visited in rings of growing size around the position, stopping as soon as no obstacle in the
+        remaining rings can be closer than the best one found so far, nor contain the position.
+
+        :param x: The x position
+        :param y: The y position
+        :param max_distance: The value returned when no obstacle is closer than it
+        :return: The distance to the closest obstacle, or -1 if colliding
+        """
+
+        if self.size == 0:
+            return max_distance
+
+        cx, cy = self._cell(x, y)
+        best = max_distance
+        max_ring = max(abs(cx - self._min_cell[0]), abs(cx - self._max_cell[0]),
+                       abs(cy - self._min_cell[1]), abs(cy - self._max_cell[1]))
+
+        for ring in range(max_ring + 1):
+            for cell in self._ring(cx, cy, ring):
+                for ox, oy, radius in self._cells.get(cell, ()):
+                    dx = ox - x
+                    dy = oy - y
+                    obstacle_distance = math.sqrt(dx * dx + dy * dy)
+                    if obstacle_distance <= radius:
+                        return -1.0
+                    if obstacle_distance < best:
+                        best = obstacle_distance
+
+            # Centers outside the rings visited so far are at least this far from the position
+            reach = min(x - (cx - ring) * self.cell_size, (cx + ring + 1) * self.cell_size - x,
+                        y - (cy - ring) * self.cell_size, (cy + ring + 1) * self.cell_size - y)
+            if best <= reach and reach > self.max_radius:
+                break
+
+        return best
+
+    def distances(self, xs, ys, max_distance: float = math.inf) -> np.ndarray:
+        """
+        Batched version of distance, for many positions at once.
+
+        All positions advance through the rings of cells together, and a position leaves the search as soon as its
+        answer is final.
+
+        :param xs: The x positions (array-like)
+        :param ys: The y positions (array-like, same shape as xs)
+        :param max_distance: The value returned when no obstacle is closer than it
+        :return: The distances to the closest obstacle (-1 where colliding), with the shape of xs
+        """
+
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        best = np.full(xs.shape, max_distance, dtype=np.float64)
+
+        if self.size == 0 or xs.size == 0:
+            return best
+
+        starts, counts, obstacle_xs, obstacle_ys, radii = self._cell_arrays()
+        min_x, min_y = self._min_cell
+        cells_x = self._max_cell[0] - min_x + 1
+        cells_y = self._max_cell[1] - min_y + 1
+        max_count = int(counts.max())
+
+        flat_x = xs.ravel()
+        flat_y = ys.ravel()
+        flat_best = best.ravel()
+        collided = np.zeros(flat_x.size, dtype=bool)
+        cx = np.floor(flat_x / self.cell_size).astype(np.int64)
+        cy = np.floor(flat_y / self.cell_size).astype(np.int64)
+        max_ring = np.maximum.reduce([np.abs(cx - min_x), np.abs(cx - self._max_cell[0]),
+                                      np.abs(cy - min_y), np.abs(cy - self._max_cell[1])])
+
+        active = np.arange(flat_x.size)
+        ring = 0
+
+        while active.size > 0:
+            px = flat_x[active]
+            py = flat_y[active]
+            pcx = cx[active]
+            pcy = cy[active]
+            current = flat_best[active]
+            inside_obstacle = collided[active]
+
+            for i, j in self._ring(0, 0, ring):
+                # Cells outside the occupied bounding box hold no obstacles
+                gx = pcx + i - min_x
+                gy = pcy + j - min_y
+                inside = (gx >= 0) & (gx < cells_x) & (gy >= 0) & (gy < cells_y)
+                cell = np.where(inside, gx * cells_y + gy, 0)
+                start = starts[cell]
+                count = np.where(inside, counts[cell], 0)
+
+                for slot in range(max_count):
+                    rows = np.flatnonzero(count > slot)
+                    if rows.size == 0:
+                        break
+                    k = start[rows] + slot
+                    dx = obstacle_xs[k] - px[rows]
+                    dy = obstacle_ys[k] - py[rows]
+                    obstacle_distance = np.sqrt(dx * dx + dy * dy)
+                    current[rows] = np.minimum(current[rows], obstacle_distance)
+                    inside_obstacle[rows] |= obstacle_distance <= radii[k]
+
+            flat_best[active] = current
+            collided[active] = inside_obstacle
+
+            reach = np.minimum.reduce([px - (pcx - ring) * self.cell_size, (pcx + ring + 1) * self.cell_size - px,
+                                       py - (pcy - ring) * self.cell_size, (pcy + ring + 1) * self.cell_size - py])
+            done = inside_obstacle | ((current <= reach) & (reach > self.max_radius)) | (max_ring[active] <= ring)
+            active = active[~done]
+            ring += 1
+
+        flat_best[collided] = -1.0
+
+        return best
+
+    def collides(self, x: float, y: float) -> bool:
+        """
+        Whether a position lies inside (or on the boundary of) an obstacle.
+
+        :param x: The x position
+        :param y: The y position
+        :return: True if colliding with an obstacle, False otherwise
+        """
+
+        if self.size == 0:
+            return False
+
+        cx, cy = self._cell(x, y)
+        reach = int(math.ceil(self.max_radius / self.cell_size))
+
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for ox, oy, radius in self._cells.get((i, j), ()):
+                    dx = ox - x
+                    dy = oy - y
+                    if math.sqrt(dx * dx + dy * dy) <= radius:
+                        return True
+
+        return False
+
+    def overlaps(self, x: float, y: float, radius: float) -> bool:
+        """
+        Whether a circle would overlap any of the indexed obstacles.
+
+        :param x: The x position of the center of the circle
+        :param y: The y position of the center of the circle
+        :param radius: The radius of the circle
+        :return: True if the circle overlaps an obstacle, False otherwise
+        """
+
+        if self.size == 0:
+            return False
+
+        cx, cy = self._cell(x, y)
+        reach = int(math.ceil((radius + self.max_radius) / self.cell_size))
+
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for ox, oy, obstacle_radius in self._cells.get((i, j), ()):
+                    dx = ox - x
+                    dy = oy - y
+                    if math.sqrt(dx * dx + dy * dy) < radius + obstacle_radius:
+                        return True
+
+        return False
+
+    def _cell_arrays(self):
+        """
+        Flattens the occupied bounding box of cells into arrays: the obstacles sorted by cell, and the start and
+        count of every cell in that order.
+
+        :return: starts, counts, obstacle x positions, obstacle y positions and obstacle radii
+        """
+
+        if self._arrays is None:
+            min_x, min_y = self._min_cell
+            cells_y = self._max_cell[1] - min_y + 1
+            cells = sorted(self._cells.items(), key=lambda item: (item[0][0] - min_x) * cells_y + item[0][1] - min_y)
+
+            counts = np.zeros((self._max_cell[0] - min_x + 1) * cells_y, dtype=np.int64)
+            obstacles = []
+            for (i, j), cell_obstacles in cells:
+                counts[(i - min_x) * cells_y + j - min_y] = len(cell_obstacles)
+                obstacles.extend(cell_obstacles)
+
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            values = np.array(obstacles, dtype=np.float64)
+            self._arrays = (starts, counts, values[:, 0].copy(), values[:, 1].copy(), values[:, 2].copy())
+
+        return self._arrays
+
+    def _cell(self, x: float, y: float):
+        """
+        :return: The grid cell containing a position
+        """
+
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int):
+        """
+        :return: The cells at Chebyshev distance ring of the cell (cx, cy)
+        """
+
+        if ring == 0:
+            yield cx, cy
+            return
+
+        for i in range(cx - ring, cx + ring + 1):
+            yield i, cy - ring
+            yield i, cy + ring
+        for j in range(cy - ring + 1, cy + ring):
+            yield cx - ring, j
+            yield cx + ring, j
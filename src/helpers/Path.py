@@ -1,11 +1,22 @@
+import hashlib
+
+import numpy as np
+
 from helpers.Coordinate import Coordinate
 
 
 class Path:
     """
     Class representing a path.
+
+    The coordinates are stored in growable float arrays, together with the length of every prefix of the path, so
+    adding or removing a coordinate and getting the length are O(1). The length is accumulated in the same order
+    as summing the steps one by one, so it is exactly the same.
     """
 
+    # Number of coordinates a new path has room for, before growing
+    INITIAL_CAPACITY = 16
+
     def __init__(self, start: Coordinate):
         """
         Path takes a starting coordinate to initialize.
@@ -13,9 +24,21 @@ class Path:
         :param start: The starting coordinate.
         """
 
-        self.path = [start]
         self.start: Coordinate = start
 
+        # (x, y) of each coordinate, whether both were integers, and the length of the path up to each coordinate
+        self._points = np.empty((self.INITIAL_CAPACITY, 2), dtype=np.float64)
+        self._integral = np.empty(self.INITIAL_CAPACITY, dtype=bool)
+        self._lengths = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._count = 0
+        self._last: Coordinate = None
+
+        # The coordinates as a list and the fingerprint, built on demand
+        self._coordinates = None
+        self._fingerprint = None
+
+        self._append(start, 0.0)
+
     def add(self, coordinate: Coordinate):
         """
         After taking a step, we add the direction we moved in.
@@ -23,9 +46,39 @@ class Path:
         :param coordinate: The coordinate we moved in.
         """
 
-        self.path.append(coordinate)
+        if self._last is None:
+            # The path was emptied, so the coordinate starts it again
+            self._append(coordinate, 0.0)
+        else:
+            self._append(coordinate, self._lengths.item(self._count - 1) + self._last.distance_to(coordinate))
         return
 
+    def _append(self, coordinate: Coordinate, length: float):
+        """
+        Stores a coordinate at the end of the path.
+
+        :param coordinate: The coordinate
+        :param length: The length of the path up to the coordinate
+        """
+
+        if self._count == self._lengths.size:
+            # An unpickled path has no spare room (and none at all once emptied)
+            capacity = max(self.INITIAL_CAPACITY, 2 * self._lengths.size)
+            self._points = np.resize(self._points, (capacity, 2))
+            self._integral = np.resize(self._integral, capacity)
+            self._lengths = np.resize(self._lengths, capacity)
+
+        self._points[self._count] = coordinate.x, coordinate.y
+        self._integral[self._count] = isinstance(coordinate.x, (int, np.integer)) and \
+            isinstance(coordinate.y, (int, np.integer))
+        self._lengths[self._count] = length
+        self._count += 1
+        self._last = coordinate
+
+        if self._coordinates is not None:
+            self._coordinates.append(coordinate)
+        self._fingerprint = None
+
     def size(self):
         """
         Returns the (Euclidean) length of the path
@@ -33,12 +86,10 @@ class Path:
         :return: Length of the path
         """
 
-        size = 0
+        if self._count <= 1:
+            return 0.0
 
-        for i in range(len(self.path) - 1):
-            size += self.path[i].distance_to(self.path[i + 1])
-
-        return size
+        return self._lengths.item(self._count - 1)
 
     def get_path(self):
         """
@@ -47,7 +98,10 @@ class Path:
         :return: List of directions
         """
 
-        return self.path
+        if self._coordinates is None:
+            self._coordinates = [self._coordinate(i) for i in range(self._count)]
+
+        return self._coordinates
 
     def get_start(self):
         """
@@ -58,6 +112,36 @@ class Path:
 
         return self.start
 
+    def last(self) -> Coordinate:
+        """
+        :return: The last coordinate of the path
+        """
+
+        return self._last
+
+    def as_array(self) -> np.ndarray:
+        """
+        The coordinates of the path, without copying them. The array must not be modified, and is only valid until
+        the path changes.
+
+        :return: A (number of coordinates, 2) array with the x and y of each coordinate
+        """
+
+        return self._points[:self._count]
+
+    def fingerprint(self) -> bytes:
+        """
+        A short digest of the coordinates of the path, cached until the path changes. Equal paths have the same
+        fingerprint.
+
+        :return: The fingerprint
+        """
+
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.blake2b(self.as_array().tobytes(), digest_size=16).digest()
+
+        return self._fingerprint
+
     def shorter_than(self, other):
         """
         Function that checks whether a path is smaller than another path.
@@ -73,9 +157,57 @@ class Path:
         Take a step back in the path and return the last direction.
 
         :return: The last direction
+        :raises: IndexError if the path is empty.
+        """
+
+        if self._count == 0:
+            raise IndexError("remove_last from an empty path")
+
+        last = self._last
+        self._count -= 1
+        self._last = self._coordinate(self._count - 1) if self._count > 0 else None
+
+        if self._coordinates is not None:
+            self._coordinates.pop()
+        self._fingerprint = None
+
+        return last
+
+    def truncate(self, length: int):
+        """
+        Takes steps back in the path until it has the given number of coordinates.
+
+        :param length: The number of coordinates to keep
+        """
+
+        if length >= self._count:
+            return
+
+        self._count = max(length, 0)
+        self._last = self._coordinate(self._count - 1) if self._count > 0 else None
+
+        if self._coordinates is not None:
+            del self._coordinates[self._count:]
+        self._fingerprint = None
+
+    def __len__(self):
+        """
+        :return: The number of coordinates of the path
         """
 
-        return self.path.pop()
+        return self._count
+
+    def _coordinate(self, i: int) -> Coordinate:
+        """
+        :return: The i-th coordinate of the path, with integer x and y if it was added with integers
+        """
+
+        x, y = self._points[i].tolist()
+
+        if self._integral[i]:
+            return Coordinate(int(x), int(y))
+
+        return Coordinate(x, y)
 
     def __str__(self):
         """
@@ -86,7 +218,7 @@ class Path:
 
         string = ""
 
-        for coordinate in self.path:
+        for coordinate in self.get_path():
             string += str(coordinate)
             string += ";\n"
 
@@ -100,7 +232,22 @@ class Path:
         :return: Whether they are equal
         """
 
-        return self.start == other.start and self.path == other.path
+        if self is other:
+            return True
+        if not isinstance(other, Path):
+            return NotImplemented
+
+        return self._count == other._count and self.size() == other.size() and \
+            self.fingerprint() == other.fingerprint()
+
+    def __getstate__(self):
+        # Only the used part of the arrays is sent, and the caches are rebuilt on demand
+        state = self.__dict__.copy()
+        state["_points"] = self._points[:self._count].copy()
+        state["_integral"] = self._integral[:self._count].copy()
+        state["_lengths"] = self._lengths[:self._count].copy()
+        state["_coordinates"] = None
+        return state
 
     def write_to_file(self, file_path):
         """
@@ -112,7 +259,7 @@ class Path:
 
         f = open(file_path, "w")
         string = ""
-        string += str(len(self.path))
+        string += str(self._count)
         string += ";\n"
         string += str(self.start)
         string += ";\n"
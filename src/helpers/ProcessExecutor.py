@@ -0,0 +1,76 @@
+import pickle
+import random
+from multiprocessing import Pool
+
+import numpy as np
+
+from helpers.Executor import Executor
+
+# The state of the executor, in each worker process
+_worker_state = None
+
+
+def _initialize_worker(state):
+    """
+    Runs once in each worker process: keeps the state and gives the worker its own random streams (forked workers
+    would otherwise all repeat the random numbers of the parent).
+
+    :param state: The pickled state of the executor
+    """
+
+    global _worker_state
+    _worker_state = pickle.loads(state)
+
+    random.seed()
+    np.random.seed()
+
+
+def _run_task(function_and_task):
+    function, task = function_and_task
+    return function(_worker_state, task)
+
+
+class ProcessExecutor(Executor):
+    """
+    Executor running the tasks on a persistent pool of processes.
+
+    The state is pickled once and sent to every worker when the pool starts (whatever the start method of the
+    processes), and the pool is reused as long as the executor is
+    started with the same state. Only the tasks and their results go through the pool afterwards, so the tasks have
+    to carry whatever changed in the state since then.
+    """
+
+    shares_state = False
+
+    def __init__(self, workers: int = 6):
+        super().__init__(workers)
+        self._pool = None
+
+    def start(self, state):
+        if self._pool is not None and state is self.state:
+            return
+
+        self.close()
+        super().start(state)
+        self._pool = Pool(self.workers, initializer=_initialize_worker, initargs=(pickle.dumps(state),))
+
+    def map(self, function, tasks) -> list:
+        return self._pool.map(_run_task, [(function, task) for task in tasks])
+
+    def imap(self, function, tasks):
+        return self._pool.imap(_run_task, [(function, task) for task in tasks])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+        super().close()
+
+    def __getstate__(self):
+        # The pool belongs to the process that started it
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["state"] = None
+        return state
@@ -0,0 +1,75 @@
+import zlib
+
+import numpy as np
+
+
+class RandomStreams:
+    """
+    Class handing out independent, reproducible random number generators, built on numpy's SeedSequence.
+
+    Every stream is addressed by a key (a tuple of non-negative integers or strings), which is appended to the spawn
+    key of the seed sequence, exactly like SeedSequence.spawn does. The numbers of a stream therefore only depend on
+    the seed and on its key: not on the order in which streams are created, nor on the process that uses them.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Constructs the streams.
+
+        :param seed: An integer, a SeedSequence, or None to use fresh entropy from the operating system
+        """
+
+        if isinstance(seed, RandomStreams):
+            seed = seed.seed_sequence
+
+        self.seed_sequence: np.random.SeedSequence = \
+            seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    def child(self, *key):
+        """
+        The streams below a key. Keys used with child should not overlap with the ones given out by spawn.
+
+        :param key: The key, made of non-negative integers and strings
+        :return: The streams below the key (always the same for the same key)
+        """
+
+        spawn_key = self.seed_sequence.spawn_key + tuple(self._key_part(part) for part in key)
+
+        return RandomStreams(np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=spawn_key,
+                                                    pool_size=self.seed_sequence.pool_size))
+
+    def spawn(self):
+        """
+        :return: The next independent streams spawned from these ones (one per call, e.g. one per run)
+        """
+
+        return RandomStreams(self.seed_sequence.spawn(1)[0])
+
+    def generator(self, *key) -> np.random.Generator:
+        """
+        :param key: The key of the stream (no key for the stream of the seed sequence itself)
+        :return: A numpy Generator for the stream
+        """
+
+        return np.random.default_rng(self.child(*key).seed_sequence)
+
+    def integer_seed(self, *key) -> int:
+        """
+        :param key: The key of the stream (no key for the stream of the seed sequence itself)
+        :return: A (256-bit) integer seed for the stream, for the code that takes an integer seed
+        """
+
+        state = self.child(*key).seed_sequence.generate_state(4, np.uint64)
+
+        return int.from_bytes(state.tobytes(), "little")
+
+    @staticmethod
+    def _key_part(part) -> int:
+        """
+        :return: The integer used in the spawn key for a part of a key (strings are hashed, to name the streams)
+        """
+
+        if isinstance(part, str):
+            return zlib.crc32(part.encode())
+
+        return int(part)
@@ -0,0 +1,140 @@
+import os
+import pickle
+import tempfile
+import time
+
+
+class RunCache:
+    """
+    Class keeping the results of algorithm runs on disk, by fingerprint, so identical runs are not computed again.
+
+    Every entry is a pickle file in the cache directory. Reading an entry refreshes its modification time, and once the
+    entries take more than the size limit, the least recently used ones are removed. Entries are written atomically,
+    so several processes can share a cache directory.
+    """
+
+    # The version of the cached runs, part of their fingerprints: to bump whenever a change to the algorithms (or to
+    # what is cached) changes the results of the runs, so the entries of the previous code are not used anymore
+    VERSION = 2
+
+    # The suffixes of the entries, and of the files being written
+    SUFFIX = ".pkl"
+    TEMPORARY_SUFFIX = ".tmp"
+    # How old (in seconds) a file being written must be to be taken as left by a crashed process
+    STALE_SECONDS = 3600
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Opens the cache, creating its directory if needed.
+
+        :param directory: The directory of the cache entries
+        :param max_bytes: The size limit of the entries
+        """
+
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _entries(self, suffix: str = SUFFIX) -> list:
+        """
+        :param suffix: The suffix of the files listed (by default, the entries)
+        :return: The (modification time, size, file) of every file with the suffix
+        """
+
+        entries = []
+        with os.scandir(self.directory) as files:
+            for file in files:
+                if file.name.endswith(suffix):
+                    try:
+                        stat = file.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, file.path))
+
+        return entries
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key: str):
+        return os.path.exists(self._file(key))
+
+    def get(self, key: str):
+        """
+        :param key: The fingerprint of the entry
+        :return: The cached value, or None if not cached
+        """
+
+        file = self._file(key)
+        try:
+            with open(file, "rb") as stream:
+                value = pickle.load(stream)
+            os.utime(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        return value
+
+    def put(self, key: str, value):
+        """
+        Caches a value, and evicts the least recently used entries beyond the size limit.
+
+        :param key: The fingerprint of the entry
+        :param value: The (picklable) value
+        """
+
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=self.TEMPORARY_SUFFIX)
+        try:
+            with os.fdopen(descriptor, "wb") as stream:
+                pickle.dump(value, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._file(key))
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries, until the entries fit in the size limit, and the stale files left by
+        interrupted writes.
+        """
+
+        stale = time.time_ns() - self.STALE_SECONDS * 10 ** 9
+        for mtime, _, file in self._entries(self.TEMPORARY_SUFFIX):
+            if mtime < stale:
+                try:
+                    os.remove(file)
+                except FileNotFoundError:
+                    pass
+
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, file in entries:
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Removes every entry, and the files left by interrupted writes.
+        """
+
+        for _, _, file in self._entries() + self._entries(self.TEMPORARY_SUFFIX):
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
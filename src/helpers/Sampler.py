@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class Sampler:
+    """
+    Class drawing random choices for an agent, from a buffer of uniform variates.
+
+    The variates are drawn from the random number generator in blocks, ahead of time, which avoids the fixed cost of
+    a call into NumPy for every single draw.
+    """
+
+    def __init__(self, rng=None, block_size: int = 256):
+        """
+        Constructs the sampler.
+
+        :param rng: The random number generator (a numpy Generator, or the np.random module). Default: np.random
+        :param block_size: How many variates are drawn at once
+        """
+
+        self.rng = np.random if rng is None else rng
+        self.block_size: int = block_size
+        self._buffer = []
+        self._next = 0
+
+    def uniform(self) -> float:
+        """
+        :return: A random number in [0, 1)
+        """
+
+        if self._next == len(self._buffer):
+            self._buffer = self.rng.random(self.block_size).tolist()
+            self._next = 0
+
+        value = self._buffer[self._next]
+        self._next += 1
+
+        return value
+
+    def choice(self, weights, total: float = None) -> int:
+        """
+        Picks an index with a probability proportional to its weight, by searching the cumulative sum of the weights.
+
+        :param weights: The (non-negative, not all zero) weights of the indices
+        :param total: The sum of the weights, if already known
+        :return: The index picked, which never has a zero weight
+        """
+
+        if total is None:
+            total = sum(weights)
+
+        threshold = self.uniform() * total
+        cumulative = 0.0
+        last = 0
+
+        for i, weight in enumerate(weights):
+            if weight > 0:
+                cumulative += weight
+                last = i
+                if threshold < cumulative:
+                    return i
+
+        # Only reached through rounding, when the threshold is (almost) the total
+        return last
@@ -0,0 +1,13 @@
+from helpers.Executor import Executor
+
+
+class SerialExecutor(Executor):
+    """
+    Executor running the tasks one after the other, in the calling thread.
+    """
+
+    def __init__(self):
+        super().__init__(1)
+
+    def map(self, function, tasks) -> list:
+        return [function(self.state, task) for task in tasks]
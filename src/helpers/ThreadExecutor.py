@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.Executor import Executor
+
+
+class ThreadExecutor(Executor):
+    """
+    Executor running the tasks on a pool of threads, which all see the same state.
+
+    Threads only run in parallel while the tasks release the GIL (i.e. inside NumPy), but they have no start-up or
+    serialization cost.
+    """
+
+    def __init__(self, workers: int = 6):
+        super().__init__(workers)
+        self._pool = None
+
+    def start(self, state):
+        super().start(state)
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers)
+
+    def map(self, function, tasks) -> list:
+        state = self.state
+        return list(self._pool.map(lambda task: function(state, task), tasks))
+
+    def imap(self, function, tasks):
+        state = self.state
+        return self._pool.map(lambda task: function(state, task), tasks)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+        super().close()